@@ -1,5 +1,26 @@
-from .loader import load_scores, validate
-from .rr_matcher import match_individuals
-from .elim_matcher import create_teams, match_teams
+from importlib import import_module
 
-__all__ = ["load_scores", "validate", "match_individuals", "create_teams", "match_teams"]
\ No newline at end of file
+# loaded on first use, so importing Utils or Utils.schedule doesn't pull in pandas
+_EXPORTS = {
+	"load_scores": ".loader",
+	"load_partitions": ".loader",
+	"validate": ".loader",
+	"missing_columns": ".loader",
+	"match_individuals": ".rr_matcher",
+	"match_table": ".rr_matcher",
+	"ArcherRegistry": ".registry",
+	"create_teams": ".elim_matcher",
+	"match_teams": ".elim_matcher",
+}
+
+__all__ = ["load_scores", "load_partitions", "validate", "missing_columns", "match_individuals", "match_table", "ArcherRegistry", "create_teams", "match_teams"]
+
+def __getattr__(name):
+	if name in _EXPORTS:
+		value = getattr(import_module(_EXPORTS[name], __name__), name)
+		globals()[name] = value
+		return value
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+	return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+from . import profiling
+from .registry import ArcherRegistry
+from .swiss import BYE
+
+LANES = ("A vs B", "C vs D")
+
+def flight_matches(registry : ArcherRegistry, table : pd.DataFrame) -> pd.DataFrame:
+	"""
+	Every real match of a match_table as one row with Division, Flight Number, Round, First and Second archer ids, in
+	play order: round 1 of every flight, then round 2, and so on. BYE matches are dropped. Pairings come from the ids,
+	never from rendered "X vs Y" cells, so any name is safe.
+	:param registry: the ArcherRegistry of the table
+	:param table:
+	:return:
+	"""
+	matches = table[["Division", "Flight Number", "Round", "First", "Second"]]
+	if BYE in registry:
+		bye = registry.id(BYE)
+		matches = matches[(matches["First"] != bye) & (matches["Second"] != bye)]
+	# the table is already in flight, round, match order
+	return matches.sort_values(by="Round", kind="stable").reset_index(drop=True)
+
+def pack_slots(first : np.ndarray, second : np.ndarray, capacity : int) -> np.ndarray:
+	"""
+	Greedy slot for every match in the order given: the first slot after both archers' previous matches that still
+	has room. Free slots are found through a next-free-slot forest with path compression, so packing is about O(m).
+	:param first: archer ids
+	:param second: archer ids
+	:param capacity: matches per slot
+	:return: 0-based slot per match
+	"""
+	assert capacity >= 1, "There should be at least one bale."
+	number_of_matches = len(first)
+	last = np.full(int(max(first.max(initial=-1), second.max(initial=-1))) + 1, -1, dtype=np.int64)
+	used = [0] * (number_of_matches + 1)
+	next_free = list(range(number_of_matches + 2))
+	slots = np.empty(number_of_matches, dtype=np.int64)
+
+	def find(slot : int) -> int:
+		root = slot
+		while next_free[root] != root:
+			root = next_free[root]
+		while next_free[slot] != root:
+			next_free[slot], slot = root, next_free[slot]
+		return root
+
+	for i, (a, b) in enumerate(zip(first.tolist(), second.tolist())):
+		slot = find(max(last[a], last[b]) + 1)
+		slots[i] = slot
+		last[a] = last[b] = slot
+		used[slot] += 1
+		if used[slot] == capacity:
+			next_free[slot] = slot + 1
+	return slots
+
+@profiling.timed("schedule_bales")
+def schedule_bales(registry : ArcherRegistry, table : pd.DataFrame, bales : int, slot_minutes : Optional[int] = None, start : str = "09:00") -> pd.DataFrame:
+	"""
+	Pack every flight onto a range of bales, two matches per bale (lanes "A vs B" and "C vs D") per time slot.
+	No archer shoots twice in a slot, and each archer's matches keep their round order.
+	:param registry: the ArcherRegistry of the table; names are only looked up for the matches in the plan
+	:param table: match_table
+	:param bales:
+	:param slot_minutes: length of a slot; adds a Start column counted from start
+	:param start: "HH:MM"
+	:return: Slot, Bale, Lane, Division, Flight Number, Round and Matchup, one row per match in slot and bale order
+	"""
+	with profiling.stage("bale_matches"):
+		matches = flight_matches(registry, table)
+		# an archer is a (division, name) pair, so the same name in two divisions is two archers
+		divisions = pd.factorize(matches["Division"].to_numpy())[0]
+		names = np.concatenate([matches["First"].to_numpy(), matches["Second"].to_numpy()]).astype(np.int64)
+		ids = pd.factorize(np.tile(divisions, 2) * len(registry) + names)[0]
+
+	with profiling.stage("bale_pack", bales=bales):
+		slots = pack_slots(ids[:len(matches)], ids[len(matches):], capacity=len(LANES) * bales)
+
+	order = np.argsort(slots, kind="stable")
+	slots = slots[order]
+	labels = registry.labels()
+	matchups = labels[matches["First"].to_numpy()[order]] + " vs " + labels[matches["Second"].to_numpy()[order]]
+	# position inside the slot
+	seat = np.arange(len(slots)) - np.searchsorted(slots, slots, side="left")
+	plan = pd.DataFrame({
+		"Slot": slots + 1,
+		"Bale": seat // len(LANES) + 1,
+		"Lane": np.asarray(LANES, dtype=object)[seat % len(LANES)],
+		"Division": matches["Division"].to_numpy()[order],
+		"Flight Number": matches["Flight Number"].to_numpy()[order],
+		"Round": matches["Round"].to_numpy()[order],
+		"Matchup": matchups,
+	})
+	if slot_minutes is not None:
+		starts = pd.Timestamp(f"2000-01-01 {start}") + pd.to_timedelta(slots * slot_minutes, unit="min")
+		plan.insert(1, "Start", starts.strftime("%H:%M"))
+	return plan
+
+def slot_lower_bound(registry : ArcherRegistry, table : pd.DataFrame, bales : int) -> int:
+	"""
+	No packing can use fewer slots than the matches over the range's capacity, or than a flight's rounds
+	:param registry:
+	:param table: match_table
+	:param bales:
+	:return:
+	"""
+	matches = flight_matches(registry, table)
+	if matches.empty:
+		return 0
+	rounds = matches.groupby(["Division", "Flight Number"], observed=True)["Round"].nunique().max()
+	return int(max(-(-len(matches) // (len(LANES) * bales)), rounds))
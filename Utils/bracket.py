@@ -0,0 +1,194 @@
+import json
+from functools import lru_cache
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+from .swiss import BYE
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+# slot values besides entrant positions
+UNDECIDED = -1
+EMPTY = -2  # a bye, or a match between two byes
+BRACKET_COLUMNS = ["Round", "Match", "Top Seed", "Top", "Bottom Seed", "Bottom", "Winner"]
+
+def bracket_size(number_of_entrants : int) -> int:
+	"""
+	Leaves of the bracket, the smallest power of two that fits everyone
+	:param number_of_entrants:
+	:return:
+	"""
+	return 1 << max(number_of_entrants - 1, 0).bit_length()
+
+@lru_cache(maxsize=None)
+def seed_order(size : int) -> np.ndarray:
+	"""
+	1-based seeds of a power-of-two bracket from top to bottom, e.g. 8 gives 1, 8, 4, 5, 2, 7, 3, 6.
+	Each doubling puts seed s against size + 1 - s, so seeds 1 and 2 can only meet in the final and byes, the seeds
+	past the field, all fall against the top seeds in round 1. Read-only and cached per size.
+	:param size: a power of two
+	:return:
+	"""
+	assert size >= 1 and size & (size - 1) == 0, f"{size} is not a power of two."
+	order = np.ones(1, dtype=np.int64)
+	while len(order) < size:
+		order = np.stack([order, 2 * len(order) + 1 - order], axis=1).ravel()
+	order.flags.writeable = False
+	return order
+
+class Bracket:
+	"""
+	Seeded single-elimination bracket for one division, stored as a binary heap: node 1 is the final, nodes
+	2 * node and 2 * node + 1 are the matches feeding it and the leaves hold the seeds in seed_order. Every node holds
+	the position of the entrant who reached it, so a result moves one entrant up one node and locating an entrant is
+	a lookup of the highest node they reached, both O(1). Byes are played out when the bracket is built.
+	"""
+
+	def __init__(self, names : Sequence[str]):
+		"""
+		:param names: entrants in seed order, best first
+		"""
+		self.names = list(names)
+		self.positions = {name: position for position, name in enumerate(self.names)}
+		self.size = bracket_size(len(self.names))
+		self.slots = np.full(2 * self.size, UNDECIDED, dtype=np.int64)
+		seeds = seed_order(self.size)
+		self.slots[self.size:] = np.where(seeds <= len(self.names), seeds - 1, EMPTY)
+		for node in range(self.size - 1, 0, -1):
+			top, bottom = self.slots[2 * node], self.slots[2 * node + 1]
+			if top == EMPTY or bottom == EMPTY:
+				self.slots[node] = bottom if top == EMPTY else top
+		self.reached = np.zeros(len(self.names), dtype=np.int64)  # highest node per entrant
+		self._locate()
+
+	def _locate(self):
+		for node in range(2 * self.size - 1, 0, -1):
+			if self.slots[node] >= 0:
+				self.reached[self.slots[node]] = node
+
+	@property
+	def rounds(self) -> int:
+		return self.size.bit_length() - 1
+
+	@property
+	def champion(self) -> Optional[str]:
+		return self.names[self.slots[1]] if self.slots[1] >= 0 else None
+
+	def _position(self, entrant : Union[int, str]) -> int:
+		if isinstance(entrant, str):
+			assert entrant in self.positions, f"{entrant} isn't in the bracket."
+			return self.positions[entrant]
+		assert 1 <= entrant <= len(self.names), f"There is no seed {entrant}."
+		return int(entrant) - 1
+
+	def node(self, round_number : int, match : int) -> int:
+		"""
+		Heap node of a match
+		:param round_number: 1-based, the final is round rounds
+		:param match: 1-based, top to bottom
+		:return:
+		"""
+		assert 1 <= round_number <= self.rounds and 1 <= match <= self.size >> round_number, f"There is no match {match} in round {round_number}."
+		return (self.size >> round_number) + match - 1
+
+	def record_match(self, node : int, winner : Union[int, str]):
+		"""
+		Sets the winner of one match. Recording it again is a no-op, and recording the other entrant corrects it as long
+		as the previous winner hasn't played on yet.
+		:param node: see node
+		:param winner: a name, or a 1-based seed
+		:return:
+		"""
+		position = self._position(winner)
+		assert 1 <= node < self.size, f"There is no match at node {node}."
+		if self.slots[node] == position:
+			return
+		top, bottom = self.slots[2 * node], self.slots[2 * node + 1]
+		assert position in (top, bottom), f"{self.names[position]} isn't in this match."
+		assert top >= 0 and bottom >= 0, f"{self.names[position]} has no opponent yet."
+		if self.slots[node] >= 0:
+			assert node == 1 or self.slots[node // 2] == UNDECIDED, f"{self.names[self.slots[node]]} has already played on."
+			self.reached[self.slots[node]] = 2 * node if top == self.slots[node] else 2 * node + 1
+		self.slots[node] = position
+		self.reached[position] = node
+
+	def record_result(self, winner : Union[int, str]):
+		"""
+		Advances the winner of their latest match, or corrects it when they were recorded as its loser
+		:param winner: a name, or a 1-based seed
+		:return:
+		"""
+		position = self._position(winner)
+		node = int(self.reached[position])
+		assert node > 1, f"{self.names[position]} has already won the bracket."
+		self.record_match(node // 2, position + 1)
+
+	def ready(self) -> List[int]:
+		"""
+		Nodes whose two entrants are known and whose result isn't
+		:return:
+		"""
+		internal = np.arange(1, self.size)
+		mask = (self.slots[internal] == UNDECIDED) & (self.slots[2 * internal] >= 0) & (self.slots[2 * internal + 1] >= 0)
+		return internal[mask].tolist()
+
+	def _label(self, slot : int) -> str:
+		if slot == EMPTY:
+			return BYE
+		return "" if slot == UNDECIDED else self.names[slot]
+
+	def matches(self) -> List[Dict]:
+		"""
+		Every match, round 1 first and top to bottom inside a round. Byes show as 'BYE' with the seed already through.
+		:return: Round, Match, Top Seed, Top, Bottom Seed, Bottom and Winner per match; unknown names are empty and seeds None
+		"""
+		rows = []
+		for round_number in range(1, self.rounds + 1):
+			first = self.size >> round_number
+			for match, node in enumerate(range(first, 2 * first)):
+				top, bottom, winner = (int(slot) for slot in self.slots[[2 * node, 2 * node + 1, node]])
+				rows.append({
+					"Round": round_number,
+					"Match": match + 1,
+					"Top Seed": top + 1 if top >= 0 else None,
+					"Top": self._label(top),
+					"Bottom Seed": bottom + 1 if bottom >= 0 else None,
+					"Bottom": self._label(bottom),
+					"Winner": self._label(winner) if winner != EMPTY else "",
+				})
+		return rows
+
+	def frame(self) -> "pd.DataFrame":
+		"""
+		matches as a frame, with nullable integer seeds
+		:return:
+		"""
+		import pandas as pd
+		return pd.DataFrame(self.matches(), columns=BRACKET_COLUMNS).astype({"Top Seed": "Int64", "Bottom Seed": "Int64"})
+
+	@classmethod
+	def from_teams(cls, teams) -> "Bracket":
+		"""
+		A bracket of a match_teams division, seeded as the TeamTable is
+		:param teams: TeamTable
+		:return:
+		"""
+		return cls([teams.member_string(index) for index in range(len(teams))])
+
+	def to_dict(self) -> Dict:
+		return {"names": self.names, "slots": self.slots.tolist()}
+
+	@classmethod
+	def from_dict(cls, state : Dict) -> "Bracket":
+		bracket = cls(state["names"])
+		bracket.slots = np.asarray(state["slots"], dtype=np.int64)
+		bracket._locate()
+		return bracket
+
+def save_brackets(path : str, brackets : Dict[str, Bracket]):
+	with open(path, "w", encoding="utf-8") as f:
+		json.dump({division: bracket.to_dict() for division, bracket in brackets.items()}, f)
+
+def load_brackets(path : str) -> Dict[str, Bracket]:
+	with open(path, encoding="utf-8") as f:
+		return {division: Bracket.from_dict(state) for division, state in json.load(f).items()}
@@ -1,152 +1,206 @@
-import pandas as pd
-from typing import List, Dict
-import random
+import numpy as np
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, List, Dict, Optional, Union
+import heapq
+import time
+from . import profiling
 
-def o_n_alternate2_zero_based(num_players: int):
+if TYPE_CHECKING:
+    import pandas as pd
+
+def serpentine_teams(num_players: int, team_size: int, rng: Optional[Union[int, np.random.Generator]] = None, shuffle_middle: bool = True) -> np.ndarray:
+    """
+    Snake-draft teams as a (teams, team_size) array of positions, padded with -1, for players sorted by ascending score.
+    Ranked best first, the field is cut into bands of ceil(n / team_size); every band deals one player to each team,
+    alternating direction, so team 0 gets the best player and the weakest of the second band, and so on. The last band
+    is always dealt opposite to the first, so the best player is teamed with the weakest whatever the team size.
+    Bands strictly between the first and the last are dealt in a random order when shuffle_middle is set.
+    Any remainder leaves the last band short, so the teams that miss out on it have team_size - 1 players. Runs in O(n).
+    E.g. for num_players=6, team_size=2: [[0, 5], [1, 4], [2, 3]]
+    """
+    assert team_size >= 1, "Teams need at least one person."
+    num_teams = -(-num_players // team_size)
+    members = np.full((num_teams, team_size), -1, dtype=np.int64)
+    if num_players == 0:
+        return members
+
+    rank = np.arange(num_players)
+    band, offset = np.divmod(rank, num_teams)
+    last = (num_players - 1) // num_teams
+    if shuffle_middle and last > 1:
+        generator = np.random.default_rng(rng)
+        middle = (band > 0) & (band < last)
+        # band + a uniform draw in [0, 1) sorts each middle band into a random order without mixing bands
+        shuffled = np.argsort(band[middle] + generator.random(np.count_nonzero(middle)), kind="stable")
+        offset[middle] = offset[middle][shuffled]
+    team = np.where(band % 2 == 0, offset, num_teams - 1 - offset)
+    if last > 0:
+        # the weakest player goes to team 0, whichever way the bands before happened to alternate
+        last_band = band == last
+        team[last_band] = np.count_nonzero(last_band) - 1 - offset[last_band]
+    members[team, band] = num_players - 1 - rank
+
+    # weakest first inside a team, padding last
+    members = np.sort(np.where(members < 0, num_players, members), axis=1)
+    members[members == num_players] = -1
+    return members
+
+def balanced_teams(qual_scores: Sequence[float], team_size: int, time_budget: float = 0.25) -> np.ndarray:
     """
-    Returns a 0-based alternating list of indices for pairing high and low seeds.
-    E.g. for num_players=6: [0, 5, 1, 4, 2, 3]
-    Seeds are 1-based ranks: seed 1 is best player (index 1 if Gunrock inserted at 0).
+    Teams as a (teams, team_size) array of positions, padded with -1, chosen to keep team QualScore totals close.
+    Team sizes are the same as serpentine_teams gives. Players are placed best first onto the lowest-total team
+    that still has room (a heap-based LPT). Then, highest total first, a team swaps the member pair with whichever team
+    narrows the spread of totals the most, scanning all other teams in one NumPy step. It stops when a full pass finds
+    no improving swap or time_budget seconds have passed. 2-person teams skip the swaps, since LPT already pairs the
+    best with the weakest there.
     """
-    indices = []
-    low, high = 0, num_players - 1
-    while low <= high:
-        indices.append(low)
-        if low != high:
-            indices.append(high)
-        low += 1
-        high -= 1
-
-    seeds = reversed([i + 1 for i in range(num_players)])  # Seeds from 1 to num_players
-
-    return indices, seeds
-
-def o_n_alternate3(lower_bound: int = 0, upper_bound: int = 100):
-    indices = list(range(lower_bound, upper_bound + 1))
-    seeds = list(range(len(indices), 0, -1))
-    lseeds = seeds[:upper_bound // 3]
-    mseeds = seeds[upper_bound // 3 : (2 * upper_bound) // 3]
-    hseeds = seeds[(2 * upper_bound) // 3 :]
-
-    low = indices[:upper_bound // 3]
-    mid = indices[upper_bound // 3 : (2 * upper_bound) // 3]
-    high = indices[(2 * upper_bound) // 3 :]
-
-    # Shuffle mid seeds with mid indices
-    combined = list(zip(mid, mseeds))
-    random.shuffle(combined)
-    mid, mseeds = map(list, zip(*combined))
-
-    # Reverse high to get descending order (best first)
-    high = list(reversed(high))
-
-    final_indices = []
-    final_seeds = []
-
-    for i in range(max(len(low), len(mid), len(high))):
-        for l_indices, l_seeds in [(low, lseeds), (high, hseeds), (mid, mseeds)]:
-            if i < len(l_indices):
-                final_indices.append(l_indices[i])
-                final_seeds.append(l_seeds[i])
-    return final_indices, final_seeds
+    assert team_size >= 1, "Teams need at least one person."
+    deadline = time.perf_counter() + time_budget
+    points = np.asarray(qual_scores, dtype=float)
+    num_players = len(points)
+    num_teams = -(-num_players // team_size)
+    # the first num_players % num_teams teams take one extra player, as in serpentine_teams
+    capacity = np.full(num_teams, num_players // num_teams if num_teams else 0)
+    capacity[:num_players % num_teams if num_teams else 0] += 1
+
+    teams = [[] for _ in range(num_teams)]
+    totals = np.zeros(num_teams)
+    heap = [(0.0, team) for team in range(num_teams)]
+    for position in np.argsort(-points, kind="stable").tolist():
+        total, team = heapq.heappop(heap)
+        teams[team].append(position)
+        totals[team] = total + points[position]
+        if len(teams[team]) < capacity[team]:
+            heapq.heappush(heap, (totals[team], team))
+
+    members = np.full((num_teams, team_size), -1, dtype=np.int64)
+    for team, positions in enumerate(teams):
+        members[team, :len(positions)] = positions
+
+    # for pairs of members a greedy placement is already a best-with-weakest fold, which no swap improves
+    improved = team_size > 2
+    values = np.where(members >= 0, points[members], np.nan)
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for high in np.argsort(-totals, kind="stable").tolist():
+            # moving delta from high to another team changes the sum of squared totals by 2 * delta * (delta - gap),
+            # scored against every other team's members at once
+            gap = totals[high] - totals
+            delta = values[high][:, None, None] - values[None, :, :]
+            gain = np.nan_to_num(delta * (gap[None, :, None] - delta), nan=-np.inf)
+            i, low, j = np.unravel_index(np.argmax(gain), gain.shape)
+            if gain[i, low, j] > 1e-9:
+                members[high, i], members[low, j] = members[low, j], members[high, i]
+                values[high, i], values[low, j] = values[low, j], values[high, i]
+                totals[high] -= delta[i, low, j]
+                totals[low] += delta[i, low, j]
+                improved = True
+                break
+            if time.perf_counter() >= deadline:
+                break
+
+    # weakest first inside a team, padding last
+    members = np.sort(np.where(members < 0, num_players, members), axis=1)
+    members[members == num_players] = -1
+    return members
+
+class TeamTable(Sequence):
+    """
+    Teams as rows of member positions into names, ordered by seed, with a NumPy array of team totals.
+    Team strings are only rendered when the table is indexed or iterated, so it reads like the old list of strings.
+    """
+
+    def __init__(self, names: Sequence[str], seeds: Sequence, members: np.ndarray, totals: np.ndarray):
+        self.names = names
+        self.seeds = seeds  # display seed per position in names
+        self.members = members  # (teams, team_size), -1 pads teams that are one short
+        self.totals = totals
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.team_string(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("team index out of range")
+        return self.team_string(index)
+
+    def __repr__(self) -> str:
+        return repr(self.strings())
+
+    def member_string(self, index: int) -> str:
+        members = [f"{self.names[p]} ({self.seeds[p]})" for p in self.members[index].tolist() if p >= 0]
+        return " and ".join(members) if len(members) == 2 else ", ".join(members)
+
+    def team_string(self, index: int) -> str:
+        return f"{self.member_string(index)} [Total Points: {self.totals[index]} (Seed {index + 1})]"
+
+    def strings(self) -> List[str]:
+        return [self.team_string(i) for i in range(len(self))]
 
+def team_members(matching_indices: Sequence[int], team_size: int) -> np.ndarray:
+    """
+    Cuts the pairing order into consecutive teams as a (teams, team_size) array padded with -1.
+    When the field doesn't divide evenly the last teams are one short, e.g. 3-person teams from 10 archers are 3, 3, 2, 2.
+    """
+    indices = np.asarray(matching_indices, dtype=np.int64)
+    num_players = len(indices)
+    num_teams = -(-num_players // team_size)
+    members = np.full((num_teams, team_size), -1, dtype=np.int64)
+    if num_players == 0:
+        return members
+
+    size, big = divmod(num_players, num_teams)
+    big_players = big * (size + 1)
+    position = np.arange(num_players)
+    rest = np.maximum(position - big_players, 0)
+    team = np.where(position < big_players, position // (size + 1), big + rest // size)
+    slot = np.where(position < big_players, position % (size + 1), rest % size)
+    members[team, slot] = indices
+    return members
+
+@profiling.timed("create_teams")
 def create_teams(
     names: List[str],
-    matching_indices: List[int],
-    seeds: List[int],  # seeds here unused for team seeds; kept for compatibility
+    matching_indices: Union[List[int], np.ndarray],
+    seeds: List[int],  # display seed for each position in names
     qual_scores: List[float],
     team_size: int = 2
-) -> List[str]:
-
-    teams_with_scores = []
-
-    match team_size:
-        case 2:
-            if len(names) % 2 != 0:
-                names.insert(0, "Gunrock")
-                seeds.insert(0, "−∞")
-                qual_scores.insert(0, 0)
-
-            assert len(matching_indices) % 2 == 0, "Number of matching indices must be even."
-
-            for i in range(0, len(matching_indices), 2):
-                p1 = matching_indices[i]
-                p2 = matching_indices[i + 1]
-
-                team_qual_sum = qual_scores[p1] + qual_scores[p2]
-                team_str = (
-                    f"{names[p1]} ({seeds[p1]}) and {names[p2]} ({seeds[p2]})"
-                )
-                teams_with_scores.append((team_str, team_qual_sum))
-
-        case 3:
-            if len(names) % 3 != 0:
-                if len(names) % 3 == 1:
-                    for i in range(0, len(matching_indices) - 4, 3):
-                        p1, p2, p3 = matching_indices[i], matching_indices[i + 1], matching_indices[i + 2]
-                        team_qual_sum = qual_scores[p1] + qual_scores[p2] + qual_scores[p3]
-                        team_str = (
-                            f"{names[p1]} ({seeds[p1]}), {names[p2]} ({seeds[p2]}), {names[p3]} ({seeds[p3]})"
-                        )
-                        teams_with_scores.append((team_str, team_qual_sum))
-
-                    last_four = matching_indices[-4:]
-                    for i in range(0, 4, 2):
-                        p1, p2 = last_four[i], last_four[i + 1]
-                        team_qual_sum = qual_scores[p1] + qual_scores[p2]
-                        team_str = f"{names[p1]} ({seeds[p1]}) and {names[p2]} ({seeds[p2]})"
-                        teams_with_scores.append((team_str, team_qual_sum))
-
-                elif len(names) % 3 == 2:
-                    for i in range(0, len(matching_indices) - 2, 3):
-                        p1, p2, p3 = matching_indices[i], matching_indices[i + 1], matching_indices[i + 2]
-                        team_qual_sum = qual_scores[p1] + qual_scores[p2] + qual_scores[p3]
-                        team_str = (
-                            f"{names[p1]} ({seeds[p1]}), {names[p2]} ({seeds[p2]}), {names[p3]} ({seeds[p3]})"
-                        )
-                        teams_with_scores.append((team_str, team_qual_sum))
-
-                    last_two = matching_indices[-2:]
-                    p1, p2 = last_two[0], last_two[1]
-                    team_qual_sum = qual_scores[p1] + qual_scores[p2]
-                    team_str = f"{names[p1]} ({seeds[p1]}) and {names[p2]} ({seeds[p2]})"
-                    teams_with_scores.append((team_str, team_qual_sum))
+) -> TeamTable:
+    """
+    Seeds teams by total QualScore, highest total = seed 1. matching_indices is either a (teams, team_size) member
+    array such as serpentine_teams returns, or a flat pairing order that is cut into consecutive teams.
+    The inputs aren't modified.
+    """
+    members = np.asarray(matching_indices) if np.ndim(matching_indices) == 2 else team_members(matching_indices, team_size)
+    points = np.asarray(qual_scores)
+    totals = np.where(members >= 0, points[members], 0).sum(axis=1) if len(members) else np.zeros(0, dtype=points.dtype)
 
-            else:
-                for i in range(0, len(matching_indices), 3):
-                    p1, p2, p3 = matching_indices[i], matching_indices[i + 1], matching_indices[i + 2]
-                    team_qual_sum = qual_scores[p1] + qual_scores[p2] + qual_scores[p3]
-                    team_str = (
-                        f"{names[p1]} ({seeds[p1]}), {names[p2]} ({seeds[p2]}), {names[p3]} ({seeds[p3]})"
-                    )
-                    teams_with_scores.append((team_str, team_qual_sum))
-
-    # Sort teams by total QualScore ascending (lowest total = seed 1)
-    teams_with_scores.sort(key=lambda x: x[1], reverse=True)
-
-    # Assign seeds and format output strings with seed info
-    final_teams = []
-    for seed, (team_str, total_points) in enumerate(teams_with_scores, start=1):
-        final_teams.append(f"{team_str} [Total Points: {total_points} (Seed {seed})]")
-
-    return final_teams
-
-def match_teams(scores: pd.DataFrame, people_per_team: int = 2) -> Dict[str, List[str]]:
-    divisions = scores["Division"].unique()
-    flight_dict = {}
+    order = np.argsort(-totals, kind="stable")
+    return TeamTable(names, seeds, members[order], totals[order])
 
-    for division in divisions:
-        if "QualScore" not in scores.columns:
-            round_cols = [f"R{i}" for i in range(1, 11)]
-            section = scores[scores["Division"] == division].copy()
-            section["QualScore"] = section[round_cols].sum(axis=1)
-            section = section.drop(columns=round_cols)
-        else:
-            section = scores[scores["Division"] == division].copy()
+@profiling.timed("match_teams")
+def match_teams(scores: "pd.DataFrame", people_per_team: int = 2, rng: Optional[Union[int, np.random.Generator]] = None, balance: str = "serpentine", time_budget: float = 0.25) -> Dict[str, TeamTable]:
+    """
+    Teams of people_per_team for every division. An odd field of 2-person teams gets a 'Gunrock' with 0 points.
+    balance="serpentine" snake-drafts by seed, and rng makes its middle-band draw reproducible.
+    balance="optimize" uses balanced_teams to keep team totals close, spending up to time_budget seconds per division.
+    """
+    # pandas is only needed here, so the team builders above stay importable without it
+    from .loader import with_qual_score
+
+    assert balance in ("serpentine", "optimize"), f"{balance} balancing has not been implemented."
+    scores = with_qual_score(scores)
+    generator = np.random.default_rng(rng)
+    flight_dict = {}
 
-        section = section.sort_values(by=["QualScore"], ascending=True)
-        names = section["Name"].copy().tolist()
-        qual_scores = section["QualScore"].copy().tolist()
+    for division, section in scores.groupby("Division", sort=False, observed=True):
+        section = section.sort_values(by=["QualScore"], ascending=True, kind="stable")
+        names = section["Name"].tolist()
+        qual_scores = section["QualScore"].tolist()
 
         if people_per_team == 2 and len(names) % 2 != 0:
             names.insert(0, "Gunrock")
@@ -154,18 +208,16 @@ def match_teams(scores: pd.DataFrame, people_per_team: int = 2) -> Dict[str, Lis
 
         num_players = len(names)
 
-        if people_per_team == 2:
-            matching_indices, matching_seeds = o_n_alternate2_zero_based(num_players)
-        elif people_per_team == 3:
-            matching_indices, matching_seeds = o_n_alternate3(0, num_players - 1)
-        else:
-            raise NotImplementedError("Only 2 and 3 person teams are supported.")
-        matching_seeds = [seed if seed != 1 or names[idx] != "Gunrock" else 0 for idx, seed in enumerate(matching_seeds)]
-        if "Gunrock" in names and "−∞" not in matching_seeds:
-            idx_gunrock = names.index("Gunrock")
-            matching_seeds[idx_gunrock] = "−∞"
-
-        final_teams = create_teams(names, matching_indices, matching_seeds, qual_scores, people_per_team)
-        flight_dict[division] = final_teams
+        # seed 1 is the best player, the last position
+        seeds = list(range(num_players, 0, -1))
+        if names and names[0] == "Gunrock" and len(names) > len(section):
+            seeds[0] = "−∞"
+
+        with profiling.stage("teams", division=division, team_size=people_per_team):
+            if balance == "optimize":
+                members = balanced_teams(qual_scores, people_per_team, time_budget)
+            else:
+                members = serpentine_teams(num_players, people_per_team, generator)
+            flight_dict[division] = create_teams(names, members, seeds, qual_scores, people_per_team)
 
     return flight_dict
@@ -1,28 +1,267 @@
+import os
 import pandas as pd
+import numpy as np
+from collections import defaultdict
+from enum import IntFlag
+from typing import Dict, Iterable, List, Optional, Tuple
+from . import profiling
 
-def load_scores(path: str = "Data/scores.tsv", remove_errors : bool = False) -> pd.DataFrame:
+ROUND_COLUMNS = [f"R{i}" for i in range(1, 11)]
+# round scores parse as plain float32 with NaN for a blank; nullable Int16 goes through a far slower CSV path
+SCORE_DTYPES = {"Name": "string", "Division": "category", "QualScore": "float64", **{column: "float32" for column in ROUND_COLUMNS}}
+PARQUET_SUFFIXES = (".parquet", ".pq")
+FEATHER_SUFFIXES = (".feather", ".arrow")
+
+class Issue(IntFlag):
+	"""
+	Reason codes for a bad score row. A row can carry several at once.
+	"""
+	MISSING_NAME = 1
+	MISSING_DIVISION = 2
+	MISSING_SCORE = 4
+	NOT_NUMERIC = 8
+	OUT_OF_RANGE = 16
+	DUPLICATE_NAME = 32
+	UNKNOWN_DIVISION = 64
+
+_ISSUE_MESSAGES = {
+	Issue.MISSING_NAME: "has no name",
+	Issue.MISSING_DIVISION: "has no division",
+	Issue.MISSING_SCORE: "appears to be missing scores",
+	Issue.NOT_NUMERIC: "has scores that are not numbers",
+	Issue.OUT_OF_RANGE: "has scores outside the allowed range",
+	Issue.DUPLICATE_NAME: "appears more than once in the same division",
+	Issue.UNKNOWN_DIVISION: "is in a division that isn't on the list",
+}
+
+class ValidationReport:
+	"""
+	Row labels of bad score rows and a bitmask of Issue codes for each
+	"""
+	def __init__(self, index : pd.Index, codes : np.ndarray):
+		self.index = index
+		self.codes = codes
+
+	def __len__(self) -> int:
+		return len(self.index)
+
+	def __bool__(self) -> bool:
+		return len(self.index) > 0
+
+	def rows(self, issue : Optional[Issue] = None) -> pd.Index:
+		"""
+		Row labels with any issue, or only the given one
+		:param issue:
+		:return:
+		"""
+		if issue is None:
+			return self.index
+		return self.index[(self.codes & issue) != 0]
+
+	def counts(self) -> Dict[str, int]:
+		"""
+		Number of rows per issue
+		:return:
+		"""
+		return {issue.name: int(np.count_nonzero(self.codes & issue)) for issue in Issue if np.any(self.codes & issue)}
+
+	def messages(self, scores : pd.DataFrame) -> List[str]:
+		"""
+		One readable line per bad row
+		:param scores: the frame that was validated
+		:return:
+		"""
+		names = scores.loc[self.index, "Name"].tolist() if "Name" in scores.columns else [None] * len(self)
+		lines = []
+		for label, name, code in zip(self.index, names, self.codes.tolist()):
+			who = name if isinstance(name, str) else f"Row {label}"
+			reasons = ", ".join(message for issue, message in _ISSUE_MESSAGES.items() if code & issue)
+			lines.append(f"{who} {reasons}. You should check that.")
+		return lines
+
+	def drop(self, scores : pd.DataFrame) -> pd.DataFrame:
+		"""
+		The validated frame without the bad rows
+		:param scores:
+		:return:
+		"""
+		return scores.drop(index=self.index)
+
+def _flag(codes : np.ndarray, mask : np.ndarray, issue : Issue):
+	codes[mask] |= np.uint8(issue)
+
+def _separator(path : str) -> str:
+	return "," if path.lower().endswith(".csv") else "\t"
+
+def _file_format(path : str) -> str:
+	suffix = os.path.splitext(path)[1].lower()
+	if suffix in PARQUET_SUFFIXES:
+		return "parquet"
+	if suffix in FEATHER_SUFFIXES:
+		return "feather"
+	return "csv"
+
+def _available_columns(path : str, sep : str) -> List[str]:
 	"""
-	Loads and validates scores for round robin
+	Column names from the file header or schema without reading any rows
 	:param path:
+	:param sep:
 	:return:
 	"""
-	scores = pd.read_csv(path, sep="\t")
+	match _file_format(path):
+		case "parquet":
+			import pyarrow.parquet
+			return pyarrow.parquet.read_schema(path).names
+		case "feather":
+			import pyarrow.ipc
+			return pyarrow.ipc.open_file(path).schema.names
+		case _:
+			return pd.read_csv(path, sep=sep, nrows=0).columns.tolist()
+
+def _compact_rounds(scores : pd.DataFrame) -> pd.DataFrame:
+	"""
+	Narrows float32 round scores to int16 when none are missing and all are whole numbers
+	:param scores:
+	:return:
+	"""
+	rounds = [column for column in ROUND_COLUMNS if column in scores.columns]
+	if not rounds:
+		return scores
+	values = scores[rounds].to_numpy()
+	if np.isnan(values).any() or (values != np.round(values)).any() or np.abs(values).max(initial=0) > np.iinfo(np.int16).max:
+		return scores
+	return scores.astype({column: np.int16 for column in rounds})
+
+def missing_columns(available : Iterable[str]) -> List[str]:
+	"""
+	Columns that validate needs and the file lacks: Name, Division, and QualScore when there are no R1..R10 either
+	:param available:
+	:return: [] when the file can be validated
+	"""
+	available = list(available)
+	missing = [column for column in ("Name", "Division") if column not in available]
+	if not any(column in available for column in ROUND_COLUMNS) and "QualScore" not in available:
+		missing.append("QualScore")
+	return missing
+
+def score_columns(available : Iterable[str]) -> List[str]:
+	"""
+	The columns the matchers need: Name, Division and QualScore, or R1..R10 when there is no QualScore
+	:param available:
+	:return:
+	"""
+	available = list(available)
+	if "QualScore" in available:
+		return ["Name", "Division", "QualScore"]
+	return ["Name", "Division"] + [column for column in ROUND_COLUMNS if column in available]
+
+@profiling.timed("load_scores")
+def load_scores(path: str = "Data/scores.tsv", remove_errors : bool = False, typed : bool = False, engine : Optional[str] = None) -> pd.DataFrame:
+	"""
+	Loads and validates scores for round robin. TSV by default, comma separated for .csv, and Parquet/Feather by extension.
+	Typed loading reads only the columns in score_columns with SCORE_DTYPES declared up front, so a non-numeric score is a read error instead of a validate issue.
+	Round scores come back as int16 when the file has none missing, float32 with NaN otherwise.
+	:param path:
+	:param remove_errors: drop every row that validate reports
+	:param typed: prune columns and use compact dtypes
+	:param engine: pandas CSV engine, e.g. "pyarrow"
+	:return:
+	"""
+	sep = _separator(path)
+	columns = score_columns(_available_columns(path, sep)) if typed else None
+
+	match _file_format(path):
+		case "parquet":
+			scores = pd.read_parquet(path, columns=columns)
+		case "feather":
+			scores = pd.read_feather(path, columns=columns)
+		case _:
+			dtype = {column: SCORE_DTYPES[column] for column in columns} if typed else None
+			scores = pd.read_csv(path, sep=sep, usecols=columns, dtype=dtype, engine=engine)
+
+	if typed:
+		scores = _compact_rounds(scores.astype({column: SCORE_DTYPES[column] for column in columns}))
 	if remove_errors:
-		scores = validate(scores, remove_errors=remove_errors)
+		scores = validate(scores).drop(scores)
 	return scores
 
-def validate(scores : pd.DataFrame, remove_errors: bool = False):
+@profiling.timed("load_partitions")
+def load_partitions(path : str, chunksize : int = 100_000) -> Dict[str, pd.DataFrame]:
+	"""
+	Streams a large score file in chunks into one typed, column-pruned frame per division, so only one chunk is ever held untyped.
+	Round scores are typed as in load_scores, so each division is int16 when it has none missing.
+	CSV is read with the C engine since the pyarrow engine can't chunk; Parquet is read one batch at a time.
+	:param path:
+	:param chunksize: rows per chunk
+	:return:
 	"""
-	Validates scores for round robin
+	sep = _separator(path)
+	columns = score_columns(_available_columns(path, sep))
+	dtype = {column: SCORE_DTYPES[column] for column in columns}
+
+	match _file_format(path):
+		case "parquet":
+			import pyarrow.parquet
+			batches = pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+			chunks = (batch.to_pandas().astype(dtype) for batch in batches)
+		case "feather":
+			chunks = [pd.read_feather(path, columns=columns).astype(dtype)]
+		case _:
+			chunks = pd.read_csv(path, sep=sep, usecols=columns, dtype=dtype, chunksize=chunksize)
+
+	partitions = defaultdict(list)
+	for chunk in chunks:
+		for division, section in chunk.groupby("Division", sort=False, observed=True):
+			partitions[division].append(section)
+
+	return {
+		division: _compact_rounds(pd.concat(sections, ignore_index=True).astype({"Division": "category"}))
+		for division, sections in sorted(partitions.items())
+	}
+
+@profiling.timed("validate")
+def validate(scores : pd.DataFrame, divisions : Optional[Iterable[str]] = None, score_range : Tuple[float, float] = (0, 300)) -> ValidationReport:
+	"""
+	Validates scores for round robin with one column-wise pass per check
 	:param scores:
-	:param remove_errors:
+	:param divisions: allowed division names, anything else is UNKNOWN_DIVISION; None allows all
+	:param score_range: inclusive bounds for a single round, QualScore is checked against ten rounds' worth
 	:return:
+	:raises ValueError: when a column in missing_columns is absent, since no row can be checked without it
 	"""
-	remove_indices = []
+	missing = missing_columns(scores.columns)
+	if missing:
+		raise ValueError(f"Scores are missing the {', '.join(missing)} column{'s' if len(missing) > 1 else ''}; they need Name, Division and R1..R10 or QualScore.")
+	score_columns = [column for column in ROUND_COLUMNS if column in scores.columns]
+	low, high = score_range
+	if not score_columns:
+		score_columns = ["QualScore"]
+		low, high = low * len(ROUND_COLUMNS), high * len(ROUND_COLUMNS)
+
+	codes = np.zeros(len(scores), dtype=np.uint8)
+	_flag(codes, scores["Name"].isna().to_numpy(), Issue.MISSING_NAME)
+	_flag(codes, scores["Division"].isna().to_numpy(), Issue.MISSING_DIVISION)
+	_flag(codes, scores.duplicated(subset=["Division", "Name"]).to_numpy() & scores["Name"].notna().to_numpy(), Issue.DUPLICATE_NAME)
+	if divisions is not None:
+		_flag(codes, ~scores["Division"].isin(list(divisions)).to_numpy() & scores["Division"].notna().to_numpy(), Issue.UNKNOWN_DIVISION)
 
-	for index, row in scores.iterrows():
-		if any(pd.isna(row[f"R{i}"]) for i in range(1, 11)):
-			print(f"{row["Name"]} appears to be missing scores. You should check that.")
-			if remove_errors:
-				remove_indices.append(index)
-	return scores.drop(index=remove_indices)
\ No newline at end of file
+	raw = scores[score_columns]
+	numeric = raw.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+	missing = raw.isna().to_numpy()
+	_flag(codes, missing.any(axis=1), Issue.MISSING_SCORE)
+	_flag(codes, (np.isnan(numeric) & ~missing).any(axis=1), Issue.NOT_NUMERIC)
+	with np.errstate(invalid="ignore"):
+		_flag(codes, ((numeric < low) | (numeric > high)).any(axis=1), Issue.OUT_OF_RANGE)
+
+	bad = codes != 0
+	return ValidationReport(scores.index[bad], codes[bad])
+
+def with_qual_score(scores : pd.DataFrame) -> pd.DataFrame:
+	"""
+	Adds a QualScore column summed over R1..R10 when the file only has round scores
+	:param scores:
+	:return:
+	"""
+	if "QualScore" in scores.columns:
+		return scores
+	return scores.drop(columns=ROUND_COLUMNS).assign(QualScore=scores[ROUND_COLUMNS].sum(axis=1))
\ No newline at end of file
@@ -0,0 +1,139 @@
+import os
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Tuple
+from . import profiling
+from .elim_matcher import TeamTable
+from .registry import ArcherRegistry
+from .rr_matcher import combined_frame, flights_frame, lineup_frames
+
+# "flights" and "teams" are the one-file-per-flight and one-file-per-division layouts; the rest are single files
+MATCHUP_FORMATS = ("flights", "tsv", "csv", "jsonl", "parquet")
+TEAM_FORMATS = ("teams", "tsv", "csv", "jsonl", "parquet")
+_SUFFIXES = {"tsv": ".tsv", "csv": ".csv", "jsonl": ".jsonl", "parquet": ".parquet"}
+
+def frame_bytes(df : pd.DataFrame, output_format : str) -> bytes:
+	"""
+	A whole frame rendered in memory in one go, so it is written with a single call.
+	Parquet needs pyarrow (or fastparquet).
+	:param df:
+	:param output_format: "tsv", "csv", "jsonl" or "parquet"
+	:return:
+	"""
+	match output_format:
+		case "tsv":
+			return df.to_csv(sep="\t", index=False).encode("utf-8")
+		case "csv":
+			return df.to_csv(index=False).encode("utf-8")
+		case "jsonl":
+			return df.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+		case "parquet":
+			buffer = BytesIO()
+			df.to_parquet(buffer, index=False)
+			return buffer.getvalue()
+		case _ :
+			assert False, f"{output_format} output has not been implemented."
+
+def _write_all(files : List[Tuple[str, Callable[[], bytes]]], workers : Optional[int] = None) -> List[str]:
+	"""
+	Renders and writes every (path, render) pair, on a thread pool when workers > 1
+	:param files:
+	:param workers:
+	:return: the paths, in the order given
+	"""
+	def write(file):
+		path, render = file
+		with open(path, "wb") as f:
+			f.write(render())
+		return path
+
+	if workers is not None and workers > 1 and len(files) > 1:
+		with ThreadPoolExecutor(max_workers=workers) as executor:
+			return list(executor.map(write, files))
+	return [write(file) for file in files]
+
+def write_flights(final_matchups : Dict[str, Dict[int, pd.DataFrame]], output_dir : str, output_format : str = "flights", workers : Optional[int] = None) -> List[str]:
+	"""
+	Writes match_individuals either as one {division}_flight-{flight}.tsv per flight, or as a single
+	matchups.{tsv,csv,jsonl,parquet} with Division and Flight Number columns
+	:param final_matchups:
+	:param output_dir:
+	:param output_format: one of MATCHUP_FORMATS
+	:param workers: write threads for the per-flight layout
+	:return: the files written
+	"""
+	assert output_format in MATCHUP_FORMATS, f"{output_format} output has not been implemented."
+	with profiling.stage("output", output_format=output_format):
+		if output_format == "flights":
+			files = [
+				(os.path.join(output_dir, f"{division}_flight-{flight}.tsv"), lambda matchups=matchups: matchups.to_csv(sep="\t", index=True).encode("utf-8"))
+				for division, flight_info in final_matchups.items()
+				for flight, matchups in flight_info.items()
+			]
+		else:
+			combined = flights_frame(final_matchups)
+			files = [(os.path.join(output_dir, f"matchups{_SUFFIXES[output_format]}"), lambda: frame_bytes(combined, output_format))]
+		return _write_all(files, workers)
+
+def write_table(registry : ArcherRegistry, table : pd.DataFrame, output_dir : str, output_format : str = "flights", workers : Optional[int] = None) -> List[str]:
+	"""
+	write_flights for a match_table. The single file layouts render straight from the table with combined_frame,
+	so the per-flight frames are only built for the "flights" layout.
+	:param registry:
+	:param table:
+	:param output_dir:
+	:param output_format: one of MATCHUP_FORMATS
+	:param workers: write threads for the per-flight layout
+	:return: the files written
+	"""
+	assert output_format in MATCHUP_FORMATS, f"{output_format} output has not been implemented."
+	if output_format == "flights":
+		with profiling.stage("render", matches=len(table)):
+			final_matchups = lineup_frames(registry, table)
+		return write_flights(final_matchups, output_dir, output_format, workers)
+	with profiling.stage("output", output_format=output_format):
+		combined = combined_frame(registry, table)
+		return _write_all([(os.path.join(output_dir, f"matchups{_SUFFIXES[output_format]}"), lambda: frame_bytes(combined, output_format))])
+
+def teams_frame(final_teams : Dict[str, TeamTable]) -> pd.DataFrame:
+	"""
+	Every division of match_teams in one Division/Seed/Team/Total Points frame
+	:param final_teams:
+	:return:
+	"""
+	frames = [
+		pd.DataFrame({
+			"Division": division,
+			"Seed": range(1, len(teams) + 1),
+			"Team": teams.strings(),
+			"Total Points": teams.totals,
+		})
+		for division, teams in final_teams.items()
+	]
+	if not frames:
+		return pd.DataFrame(columns=["Division", "Seed", "Team", "Total Points"])
+	return pd.concat(frames, ignore_index=True)
+
+def write_teams(final_teams : Dict[str, TeamTable], output_dir : str, people_per_team : int, output_format : str = "teams", workers : Optional[int] = None) -> List[str]:
+	"""
+	Writes match_teams either as one {division}_{k}-person_teams.txt per division, a team per line,
+	or as a single {k}-person_teams.{tsv,csv,jsonl,parquet} from teams_frame
+	:param final_teams:
+	:param output_dir:
+	:param people_per_team:
+	:param output_format: one of TEAM_FORMATS
+	:param workers: write threads for the per-division layout
+	:return: the files written
+	"""
+	assert output_format in TEAM_FORMATS, f"{output_format} output has not been implemented."
+	with profiling.stage("output", output_format=output_format):
+		if output_format == "teams":
+			files = [
+				(os.path.join(output_dir, f"{division}_{people_per_team}-person_teams.txt"), lambda teams=teams: "".join(team + "\n" for team in teams).encode("utf-8"))
+				for division, teams in final_teams.items()
+			]
+		else:
+			combined = teams_frame(final_teams)
+			files = [(os.path.join(output_dir, f"{people_per_team}-person_teams{_SUFFIXES[output_format]}"), lambda: frame_bytes(combined, output_format))]
+		return _write_all(files, workers)
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import BinaryIO, List, Optional, Union
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+
+try:
+	from pypdf import PdfWriter
+except ImportError:
+	PdfWriter = None
+
+# a flight of 16 has 15 rounds, so tables are split into chunks of rounds that fit across a letter page
+ROUNDS_PER_TABLE = 4
+
+TABLE_STYLE = TableStyle([
+	("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+	("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+	("ALIGN", (0, 0), (-1, -1), "CENTER"),
+	("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+	("FONTSIZE", (0, 0), (-1, -1), 8),
+	("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+	("TOPPADDING", (0, 0), (-1, 0), 8),
+])
+HEADING_STYLE = getSampleStyleSheet()["Heading2"]
+
+def flight_tables(table_df : pd.DataFrame) -> List[Table]:
+	"""
+	One table per ROUNDS_PER_TABLE rounds of a flight, each repeating the non-round columns such as Bale
+	:param table_df:
+	:return:
+	"""
+	round_columns = [column for column in table_df.columns if str(column).startswith("Round ")]
+	fixed_columns = [column for column in table_df.columns if column not in round_columns and column not in ("Division", "Flight Number")]
+
+	tables = []
+	for start in range(0, max(len(round_columns), 1), ROUNDS_PER_TABLE):
+		columns = fixed_columns + round_columns[start:start + ROUNDS_PER_TABLE]
+		part = table_df[columns].astype(object)
+		table_data = [columns] + part.where(part.notna(), "").values.tolist()
+		table = Table(table_data, repeatRows=1)
+		table.setStyle(TABLE_STYLE)
+		tables.append(table)
+	return tables
+
+def division_story(division : str, division_df : pd.DataFrame) -> List:
+	"""
+	Flowables for every flight of one division, a page per flight
+	:param division:
+	:param division_df: rows of the combined matchups frame for this division
+	:return:
+	"""
+	story = []
+	for flight, table_df in division_df.groupby("Flight Number", sort=True):
+		story.append(Paragraph(
+			f"<b>Division:</b> {division} &nbsp;&nbsp; <b>Flight:</b> {flight}",
+			HEADING_STYLE
+		))
+		story.append(Spacer(1, 12))
+		for table in flight_tables(table_df):
+			story.append(table)
+			story.append(Spacer(1, 12))
+		story.append(PageBreak())
+	return story
+
+def _document(output : Union[str, BinaryIO]) -> SimpleDocTemplate:
+	return SimpleDocTemplate(
+		output,
+		pagesize=letter,
+		rightMargin=36,
+		leftMargin=36,
+		topMargin=36,
+		bottomMargin=36
+	)
+
+def render_division(division : str, division_df : pd.DataFrame, output : Union[str, BinaryIO]):
+	_document(output).build(division_story(division, division_df))
+
+def _render_to_file(job) -> str:
+	division, division_df, path = job
+	render_division(division, division_df, path)
+	return path
+
+def matchups_to_pdf(df : pd.DataFrame, output : Optional[Union[str, BinaryIO]] = None, workers : Optional[int] = None) -> Optional[bytes]:
+	"""
+	Render the combined matchups frame (Division and Flight Number columns) to PDF.
+	With pypdf installed every division is rendered to its own temporary file, on a process pool when workers > 1,
+	and the files are merged into the output, so only one division's layout is ever held by reportlab at a time.
+	Without pypdf everything goes into a single document.
+	:param df:
+	:param output: path or binary file to write to; None returns the bytes
+	:param workers:
+	:return:
+	"""
+	target = BytesIO() if output is None else output
+	divisions = list(df.groupby("Division", sort=True, observed=True))
+
+	if len(divisions) <= 1 or PdfWriter is None:
+		_document(target).build([flowable for division, division_df in divisions for flowable in division_story(division, division_df)])
+	else:
+		with tempfile.TemporaryDirectory() as directory:
+			jobs = [(division, division_df, os.path.join(directory, f"{i}.pdf")) for i, (division, division_df) in enumerate(divisions)]
+			if workers is not None and workers > 1:
+				with ProcessPoolExecutor(max_workers=workers) as executor:
+					paths = list(executor.map(_render_to_file, jobs))
+			else:
+				paths = [_render_to_file(job) for job in jobs]
+
+			writer = PdfWriter()
+			for path in paths:
+				writer.append(path)
+			writer.write(target)
+			writer.close()
+
+	if output is None:
+		return target.getvalue()
+	return None
@@ -0,0 +1,101 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+
+class Profiler:
+	"""
+	Collects timed stages (with tags such as division or flight_size) and named counters
+	"""
+	def __init__(self):
+		self.records : List[Dict] = []
+		self.counters : Dict[str, int] = defaultdict(int)
+
+	@contextmanager
+	def stage(self, name : str, **tags):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.records.append({"stage": name, "seconds": time.perf_counter() - start, **tags})
+
+	def count(self, name : str, amount : int = 1):
+		self.counters[name] += amount
+
+	def summary(self) -> List[Dict]:
+		"""
+		Calls, total and slowest seconds per stage and tag combination, slowest total first
+		:return:
+		"""
+		groups = {}
+		for record in self.records:
+			tags = tuple(sorted((key, value) for key, value in record.items() if key not in ("stage", "seconds")))
+			group = groups.setdefault((record["stage"], tags), {"stage": record["stage"], **dict(tags), "calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+			group["calls"] += 1
+			group["seconds"] += record["seconds"]
+			group["max_seconds"] = max(group["max_seconds"], record["seconds"])
+		return sorted(groups.values(), key=lambda group: group["seconds"], reverse=True)
+
+	def to_dict(self) -> Dict:
+		return {"summary": self.summary(), "counters": dict(self.counters), "records": self.records}
+
+	def dump(self, path : str):
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump(self.to_dict(), f, indent=2, default=str)
+
+_active : Optional[Profiler] = None
+
+def enable() -> Profiler:
+	"""
+	Starts collecting into a fresh Profiler, which is returned
+	:return:
+	"""
+	global _active
+	_active = Profiler()
+	return _active
+
+def disable() -> Optional[Profiler]:
+	"""
+	Stops collecting and returns what was collected
+	:return:
+	"""
+	global _active
+	profiler, _active = _active, None
+	return profiler
+
+def active() -> Optional[Profiler]:
+	return _active
+
+@contextmanager
+def stage(name : str, **tags):
+	"""
+	Times the block into the active Profiler, or does nothing when profiling is off
+	:param name:
+	:param tags:
+	:return:
+	"""
+	if _active is None:
+		yield
+		return
+	with _active.stage(name, **tags):
+		yield
+
+def count(name : str, amount : int = 1):
+	if _active is not None:
+		_active.count(name, amount)
+
+def timed(name : str):
+	"""
+	Decorator form of stage for whole functions
+	:param name:
+	:return:
+	"""
+	def decorator(function):
+		@wraps(function)
+		def wrapper(*args, **kwargs):
+			with stage(name):
+				return function(*args, **kwargs)
+		return wrapper
+	return decorator
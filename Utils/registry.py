@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+class ArcherRegistry:
+	"""
+	Archer names interned to dense int32 ids, in first-seen order. Schedules, matches and teams carry these ids and
+	the names are only looked up again when a frame is rendered for export, so each name is stored once per event.
+	"""
+
+	def __init__(self, names : Iterable[str] = ()):
+		self.names : List[str] = []
+		self._ids : Dict[str, int] = {}
+		self._lookup : Optional[np.ndarray] = None
+		self._labels : Optional[np.ndarray] = None
+		self.intern(list(names))
+
+	def __len__(self) -> int:
+		return len(self.names)
+
+	def __contains__(self, name) -> bool:
+		return name in self._ids
+
+	def __repr__(self) -> str:
+		return f"ArcherRegistry({len(self)} names)"
+
+	def intern(self, names) -> np.ndarray:
+		"""
+		Ids for a sequence of names, adding the ones not seen yet. Only the distinct names touch the dictionary.
+		:param names:
+		:return: int32 array aligned with names
+		"""
+		# a missing name is kept as one NaN entry, as the matchers have always printed it
+		codes, uniques = pd.factorize(np.asarray(names, dtype=object), use_na_sentinel=False)
+		lookup = np.empty(len(uniques), dtype=np.int32)
+		for i, name in enumerate(uniques.tolist()):
+			name = np.nan if pd.isna(name) else name
+			if name not in self._ids:
+				self._ids[name] = len(self.names)
+				self.names.append(name)
+				self._lookup = self._labels = None
+			lookup[i] = self._ids[name]
+		return lookup[codes]
+
+	def id(self, name : str) -> int:
+		"""
+		Id of one name, interning it if needed
+		:param name:
+		:return:
+		"""
+		if name not in self._ids:
+			self.intern([name])
+		return self._ids[name]
+
+	def lookup(self) -> np.ndarray:
+		"""
+		Object array of names indexed by id, rebuilt only after new names are interned
+		:return:
+		"""
+		if self._lookup is None:
+			self._lookup = np.asarray(self.names, dtype=object)
+		return self._lookup
+
+	def labels(self) -> np.ndarray:
+		"""
+		lookup with every name as a string, for rendering "X vs Y" cells
+		:return:
+		"""
+		if self._labels is None:
+			self._labels = np.asarray([str(name) for name in self.names], dtype=object)
+		return self._labels
+
+	def resolve(self, ids) -> np.ndarray:
+		"""
+		Names for an array of ids
+		:param ids:
+		:return:
+		"""
+		return self.lookup()[np.asarray(ids, dtype=np.int64)]
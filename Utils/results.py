@@ -0,0 +1,178 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+from . import profiling
+from .registry import ArcherRegistry
+
+STANDINGS_COLUMNS = ["Name", "Division", "Flight Number", "Matches", "Wins", "Losses", "Ties", "Points For", "Points Against", "Differential", "Rank"]
+
+def match_key(result : Dict) -> Tuple:
+	"""
+	The same match always has the same key, whichever archer is written first
+	:param result:
+	:return:
+	"""
+	first, second = sorted((result["first"], result["second"]))
+	return (result["division"], result.get("flight"), result.get("round"), first, second)
+
+class Standings:
+	"""
+	Win/loss and point tables for every archer, updated in O(1) per result.
+	A result is a dict with division, flight, round, first, second, first_score and second_score; a later result for
+	the same match replaces the earlier one, so corrections are just appended.
+	"""
+
+	def __init__(self):
+		self.records : Dict[Tuple[str, str], List] = {}  # (division, name) -> [flight, matches, wins, losses, ties, for, against]
+		self.matches : Dict[Tuple, Dict] = {}
+		self.outstanding = set()
+		self.remaining : Dict[str, int] = {}  # outstanding matches per division
+
+	def expect(self, registry : ArcherRegistry, table : pd.DataFrame):
+		"""
+		Registers every match of a match_table as outstanding, so complete() knows when the last one is in
+		:param registry: the ArcherRegistry of the table
+		:param table:
+		:return:
+		"""
+		from .bales import flight_matches
+		matches = flight_matches(registry, table)
+		firsts, seconds = registry.resolve(matches["First"]).tolist(), registry.resolve(matches["Second"]).tolist()
+		for division, flight, round_number, first, second in zip(matches["Division"], matches["Flight Number"].tolist(), matches["Round"].tolist(), firsts, seconds):
+			key = match_key({"division": division, "flight": flight, "round": round_number, "first": first, "second": second})
+			if key not in self.matches and key not in self.outstanding:
+				self.outstanding.add(key)
+				self.remaining[division] = self.remaining.get(division, 0) + 1
+
+	def _apply(self, result : Dict, sign : int):
+		first_score, second_score = result["first_score"], result["second_score"]
+		outcome = (first_score > second_score) - (first_score < second_score)
+		for name, scored, conceded, won in ((result["first"], first_score, second_score, outcome), (result["second"], second_score, first_score, -outcome)):
+			record = self.records.setdefault((result["division"], name), [result.get("flight"), 0, 0, 0, 0, 0, 0])
+			record[1] += sign
+			record[2 if won > 0 else 3 if won < 0 else 4] += sign
+			record[5] += sign * scored
+			record[6] += sign * conceded
+
+	def record(self, result : Dict):
+		"""
+		Adds one result, first undoing an earlier result for the same match
+		:param result:
+		:return:
+		"""
+		key = match_key(result)
+		previous = self.matches.get(key)
+		if previous is not None:
+			self._apply(previous, -1)
+		self._apply(result, 1)
+		self.matches[key] = result
+		if key in self.outstanding:
+			self.outstanding.remove(key)
+			self.remaining[key[0]] -= 1
+		profiling.count("results")
+
+	def complete(self, division : Optional[str] = None) -> bool:
+		"""
+		Whether every expected match, or every expected match of one division, has a result
+		:param division:
+		:return:
+		"""
+		if division is None:
+			return not self.outstanding
+		return self.remaining.get(division, 0) == 0
+
+	def table(self, division : Optional[str] = None, flight : Optional[int] = None) -> pd.DataFrame:
+		"""
+		Current standings by division, then flight with flight 1 first, then best first inside each flight: wins, then
+		differential, then points scored. Rank is the 1-based place inside the archer's flight.
+		:param division:
+		:param flight: only this flight number
+		:return:
+		"""
+		rows = [
+			[name, record_division, *record]
+			for (record_division, name), record in self.records.items()
+			if (division is None or record_division == division) and (flight is None or record[0] == flight)
+		]
+		table = pd.DataFrame(rows, columns=STANDINGS_COLUMNS[:-2])
+		table["Differential"] = table["Points For"] - table["Points Against"]
+		table = table.sort_values(
+			by=["Division", "Flight Number", "Wins", "Differential", "Points For"], ascending=[True, True, False, False, False], kind="stable", na_position="last"
+		).reset_index(drop=True)
+		table["Rank"] = table.groupby(["Division", "Flight Number"], sort=False, dropna=False).cumcount() + 1
+		return table
+
+	def flight_tables(self, division : str) -> Dict[int, pd.DataFrame]:
+		"""
+		table for each flight of a division, in flight order
+		:param division:
+		:return:
+		"""
+		table = self.table(division)
+		return {flight: section.reset_index(drop=True) for flight, section in table.groupby("Flight Number", sort=False, dropna=False)}
+
+	def as_scores(self, division : Optional[str] = None) -> pd.DataFrame:
+		"""
+		Standings as a Name/Division/QualScore frame for match_teams. QualScore counts the archers of the division
+		placed level with or below a player in table order, so every flight 1 archer seeds above every flight 2 archer
+		and so on, and the flight 1 leader of n archers gets n. Archers of one flight with the same wins, differential
+		and points scored are level and share a QualScore.
+		:param division:
+		:return:
+		"""
+		table = self.table(division)
+		rank = table.groupby("Division", sort=False).cumcount()
+		# table is sorted on these keys, so tied archers are consecutive and share the place of the first of them
+		tied = table.duplicated(subset=["Division", "Flight Number", "Wins", "Differential", "Points For"])
+		rank = rank.where(~tied).ffill()
+		size = table.groupby("Division", sort=False)["Name"].transform("size")
+		return pd.DataFrame({"Name": table["Name"], "Division": table["Division"], "QualScore": (size - rank).astype(np.float64)})
+
+class ResultsLog:
+	"""
+	Append-only JSONL file of results, one JSON object per line, mirrored into a Standings.
+	refresh() only reads what was appended since the last call, so another process can keep writing results.
+	"""
+
+	def __init__(self, path : str, standings : Optional[Standings] = None):
+		self.path = path
+		self.standings = Standings() if standings is None else standings
+		self.offset = 0
+		self.refresh()
+
+	def refresh(self) -> int:
+		"""
+		Applies every complete line appended since the last refresh
+		:return: number of new results
+		"""
+		if not os.path.exists(self.path):
+			return 0
+		count = 0
+		with open(self.path, "rb") as f:
+			f.seek(self.offset)
+			for line in f:
+				if not line.endswith(b"\n"):
+					# a writer is still in the middle of this line
+					break
+				self.offset += len(line)
+				if line.strip():
+					self.standings.record(json.loads(line))
+					count += 1
+		return count
+
+	def append(self, results : Iterable[Dict]):
+		"""
+		Writes results to the end of the log and applies them
+		:param results:
+		:return:
+		"""
+		self.refresh()
+		with open(self.path, "ab") as f:
+			for result in results:
+				line = (json.dumps(result) + "\n").encode("utf-8")
+				f.write(line)
+				self.offset += len(line)
+				self.standings.record(result)
+			f.flush()
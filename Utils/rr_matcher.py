@@ -1,115 +1,396 @@
 import pandas as pd
-import math
-from typing import List, Tuple, Dict, Union
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, List, Tuple, Dict, Union, Optional
+from .loader import with_qual_score
+from . import profiling, templates
+from .schedule import rr_convolute, schedule_round
+from .bales import LANES
+from .registry import ArcherRegistry
+from .swiss import BYE, SwissTournament
 
-def match_individuals(scores : pd.DataFrame, people_per_flight : Union[int, List[int]] = 8, algorithm : str = "berger") -> Dict[str, Dict[str, pd.DataFrame]]:
+PARTITIONS = ("fixed", "balanced")
+
+def flight_sizes(number_of_players : int, people_per_flight : int, partition : str = "fixed") -> List[int]:
 	"""
-	Give everyone seeds, match top to bottom seeds, and create a fake 'Seed 0' Bye archer for odd numbers
-	:param scores:
+	Sizes of a division's flights, best seeded flight first.
+	"fixed" fills flights of people_per_flight and leaves the remainder to the last one.
+	"balanced" keeps the same number of flights (never more than there are pairs) but deals pairs out evenly, so every
+	flight is even except one when the division is odd. That gives the fewest byes and no flight longer than the longest
+	fixed flight, e.g. 20 archers at 7 per flight are 8, 6, 6 rather than 7, 7, 6 with two byes.
+	:param number_of_players:
+	:param people_per_flight:
+	:param partition: one of PARTITIONS
 	:return:
 	"""
+	assert people_per_flight >= 1, "There should be at least one person per flight."
+	number_of_flights = -(-number_of_players // people_per_flight)
+	match partition:
+		case "fixed":
+			full, remainder = divmod(number_of_players, people_per_flight)
+			return [people_per_flight] * full + ([remainder] if remainder else [])
+		case "balanced":
+			# never more flights than pairs, so one person per flight still gives flights of two
+			number_of_flights = min(number_of_flights, -(-number_of_players // 2))
+			if number_of_flights == 0:
+				return []
+			pairs, extra = divmod(-(-number_of_players // 2), number_of_flights)
+			sizes = [2 * (pairs + 1)] * extra + [2 * pairs] * (number_of_flights - extra)
+			if number_of_players % 2:
+				# the one odd flight is the lowest seeded of the smallest ones
+				sizes[-1] -= 1
+			return sizes
+		case _ :
+			assert False, f"{partition} partitioning has not been implemented."
 
-	divisions = sorted(scores["Division"].unique())
+def flight_ids(scores : pd.DataFrame, people_per_flight : Union[int, List[int]] = 8, partition : str = "fixed", registry : Optional[ArcherRegistry] = None) -> Dict[str, Dict[int, np.ndarray]]:
+	"""
+	split_flights as int32 archer ids from the registry, a 'BYE' id padding odd flights
+	:param scores:
+	:param people_per_flight: one size for every division or one entry per division, in sorted division order
+	:param partition: "fixed" or "balanced", see flight_sizes
+	:param registry: names are interned here, a new registry when None
+	:return:
+	"""
+	registry = ArcherRegistry() if registry is None else registry
+	with profiling.stage("split"):
+		scores = with_qual_score(scores).sort_values(by=["QualScore"], ascending=False, kind="stable")
+		ids = pd.Series(registry.intern(scores["Name"]), index=scores.index)
+		sections = ids.groupby(scores["Division"], sort=True, observed=True)
 
 	if isinstance(people_per_flight, List):
-		assert len(people_per_flight) == len(divisions), "List entry people per flight should match the number of divisions."
+		assert len(people_per_flight) == sections.ngroups, "List entry people per flight should match the number of divisions."
 
+	bye = np.array([registry.id(BYE)], dtype=np.int32)
 	flight_dict = {}
-	for d, division in enumerate(divisions):
-		people_in_this_flight = people_per_flight if isinstance(people_per_flight, int) else people_per_flight[d]
-		flight_dict[division] = {}
-		if "QualScore" not in scores.columns:
-			round_cols = [f"R{i}" for i in range(1, 11)]
-			section = scores[scores["Division"] == division].copy()
-			section["QualScore"] = section[round_cols].sum(axis=1)
-			section = section.drop(columns=round_cols)
-		section = scores[scores["Division"] == division].copy()
-		section = section.sort_values(by=["QualScore"], ascending=False)
-
-		flights = [section.iloc[i:i+people_in_this_flight] for i in range(0, len(section), people_in_this_flight)]
-
-		for i, flight in enumerate(flights):
-			if len(flight) % 2 != 0:
-				bye = pd.DataFrame([{
-					"Name": "BYE",
-					"Division": division,
-					"QualScore": -math.inf
-				}])
-				flight = pd.concat([flight, bye], ignore_index=True)
-
-			flight = flight.reset_index(drop=True)
-			flight_names = flight["Name"].tolist()
-			division_matchups = rr(flight_names, algorithm)
-			flight_dict[division][i + 1] = division_matchups
+	for d, (division, section) in enumerate(sections):
+		with profiling.stage("flights", division=division, players=len(section)):
+			flight_dict[division] = {}
+			people_in_this_flight = people_per_flight if isinstance(people_per_flight, int) else people_per_flight[d]
+			section_ids = section.to_numpy()
+			start = 0
+			for i, size in enumerate(flight_sizes(len(section_ids), people_in_this_flight, partition)):
+				flight = section_ids[start:start + size]
+				start += size
+				if len(flight) % 2 != 0:
+					flight = np.concatenate([flight, bye])
+					profiling.count("byes")
+				flight_dict[division][i + 1] = flight
 	return flight_dict
 
-def step_list_circular(arr : List, steps : int = 0):
+def split_flights(scores : pd.DataFrame, people_per_flight : Union[int, List[int]] = 8, partition : str = "fixed") -> Dict[str, Dict[int, List[str]]]:
+	"""
+	Seed every division by QualScore and cut it into flights of names, best first, padding odd flights with a 'BYE'
+	:param scores:
+	:param people_per_flight: one size for every division or one entry per division, in sorted division order
+	:param partition: "fixed" or "balanced", see flight_sizes
+	:return:
+	"""
+	registry = ArcherRegistry()
+	flight_dict = flight_ids(scores, people_per_flight, partition, registry)
+	return {
+		division: {flight: registry.resolve(ids).tolist() for flight, ids in flights.items()}
+		for division, flights in flight_dict.items()
+	}
+
+@profiling.timed("match_table")
+def match_table(scores : pd.DataFrame, people_per_flight : Union[int, List[int]] = 8, algorithm : str = "berger", partition : str = "fixed", registry : Optional[ArcherRegistry] = None) -> Tuple[ArcherRegistry, pd.DataFrame]:
+	"""
+	Every match of match_individuals as one row of Division, Flight Number, Round, Match, Bale, First and Second,
+	ordered by flight, round and match. First and Second are archer ids into the registry and Division and Bale are
+	categoricals, so no name is copied until lineup_frames or combined_frame renders the table for export.
+	The flights of one division and size are gathered from their schedule template in a single NumPy step, and each
+	gather is its own profiling stage tagged with the division.
+	:param scores:
+	:param people_per_flight: one size for every division or one entry per division, in sorted division order
+	:param algorithm: "berger", "circle" or "swiss", as in match_individuals
+	:param partition: "fixed" or "balanced" flight sizes, see flight_sizes
+	:param registry: names are interned here, a new registry when None
+	:return: the registry and the table
+	"""
+	registry = ArcherRegistry() if registry is None else registry
+	if algorithm == "swiss":
+		# Swiss pairs a whole division at once, so it is never cut into flights
+		people_per_flight = max(len(scores), 1)
+	flight_dict = flight_ids(scores, people_per_flight, partition, registry)
+	divisions = list(flight_dict)
+	flights = [(d, flight, ids) for d, division in enumerate(divisions) for flight, ids in flight_dict[division].items()]
+	profiling.count("flights", len(flights))
+
+	# (flights, rounds, pairs, 2) ids for every group of flights sharing a schedule
+	groups = []
+	if algorithm == "swiss":
+		bye = registry.id(BYE)
+		for d, flight, ids in flights:
+			with profiling.stage("swiss_pair", division=divisions[d], players=len(ids)):
+				pairs = SwissTournament(registry.resolve(ids[ids != bye]).tolist()).pair_next_round()
+			players = registry.intern([name for pair in pairs for name in pair]).reshape(1, 1, -1, 2)
+			groups.append(([d], [flight], players))
+	else:
+		by_size = {}
+		for d, flight, ids in flights:
+			by_size.setdefault((d, len(ids)), []).append((flight, ids))
+		for (d, size), group in by_size.items():
+			with profiling.stage("template", flight_size=size):
+				template = templates.get_template(number_of_competitors = size, algorithm = algorithm)
+			with profiling.stage("gather", division=divisions[d], flight_size=size, flights=len(group)):
+				players = np.stack([ids for _, ids in group])[:, template - 1]
+			groups.append(([d] * len(group), [flight for flight, _ in group], players))
+
+	columns = {name: [] for name in ("Division", "Flight Number", "Round", "Match", "First", "Second")}
+	for division_codes, flight_numbers, players in groups:
+		shape = players.shape[:3]
+		columns["Division"].append(np.broadcast_to(np.asarray(division_codes, dtype=np.int32)[:, None, None], shape).ravel())
+		columns["Flight Number"].append(np.broadcast_to(np.asarray(flight_numbers, dtype=np.int32)[:, None, None], shape).ravel())
+		columns["Round"].append(np.broadcast_to(np.arange(1, shape[1] + 1, dtype=np.int32)[None, :, None], shape).ravel())
+		columns["Match"].append(np.broadcast_to(np.arange(1, shape[2] + 1, dtype=np.int32)[None, None, :], shape).ravel())
+		columns["First"].append(players[..., 0].ravel())
+		columns["Second"].append(players[..., 1].ravel())
+	columns = {name: np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32) for name, parts in columns.items()}
+
+	order = np.lexsort((columns["Match"], columns["Round"], columns["Flight Number"], columns["Division"]))
+	columns = {name: values[order] for name, values in columns.items()}
+	table = pd.DataFrame({
+		"Division": pd.Categorical.from_codes(columns["Division"], categories=pd.Index(divisions, dtype=object)),
+		"Flight Number": columns["Flight Number"],
+		"Round": columns["Round"],
+		"Match": columns["Match"],
+		"Bale": pd.Categorical.from_codes((columns["Match"] - 1) % len(LANES), categories=list(LANES)),
+		"First": columns["First"].astype(np.int32),
+		"Second": columns["Second"].astype(np.int32),
+	})
+	return registry, table
+
+def concat_tables(tables : List[Tuple[ArcherRegistry, pd.DataFrame]]) -> Tuple[ArcherRegistry, pd.DataFrame]:
 	"""
-	Circular step in place
-	:param arr:
-	:param steps:
+	One match_table from several (registry, table) pairs, e.g. the per-division tables the app caches. Each part's ids
+	are re-interned into a new registry, so no name is rendered.
+	:param tables: at least one
+	:return: the registry and the table
+	"""
+	registry = ArcherRegistry()
+	parts = []
+	for part_registry, table in tables:
+		ids = registry.intern(part_registry.names)
+		parts.append(table.assign(First=ids[table["First"].to_numpy()], Second=ids[table["Second"].to_numpy()]))
+	table = pd.concat(parts, ignore_index=True)
+	divisions = pd.unique(pd.Index([division for _, part in tables for division in part["Division"].cat.categories], dtype=object))
+	return registry, table.assign(Division=pd.Categorical(table["Division"].astype(object), categories=divisions))
+
+def _flight_blocks(table : pd.DataFrame) -> np.ndarray:
+	# row offsets where each flight of a match_table starts, plus the end
+	division = table["Division"].cat.codes.to_numpy()
+	flight = table["Flight Number"].to_numpy()
+	changes = np.flatnonzero((division[1:] != division[:-1]) | (flight[1:] != flight[:-1])) + 1
+	return np.concatenate([[0], changes, [len(table)]]) if len(table) else np.zeros(1, dtype=np.int64)
+
+def _matchup_cells(registry : ArcherRegistry, table : pd.DataFrame) -> np.ndarray:
+	# the one place names come back: an "X vs Y" string per row of the table
+	labels = registry.labels()
+	return labels[table["First"].to_numpy()] + " vs " + labels[table["Second"].to_numpy()]
+
+def lineup_frames(registry : ArcherRegistry, table : pd.DataFrame) -> Dict[str, Dict[int, pd.DataFrame]]:
+	"""
+	Renders a match_table as match_individuals does, a Bale/Round N frame per flight
+	:param registry:
+	:param table:
 	:return:
 	"""
-	for step in range(steps):
-		arr.append(arr.pop(0))
-	return arr
+	cells = _matchup_cells(registry, table)
+	rounds = table["Round"].to_numpy()
+	divisions = table["Division"].to_numpy()
+	flights = table["Flight Number"].to_numpy()
+	final_lineups = {division: {} for division in table["Division"].cat.categories}
+	blocks = _flight_blocks(table)
+	for start, stop in zip(blocks[:-1].tolist(), blocks[1:].tolist()):
+		number_of_rounds = int(rounds[stop - 1])
+		flight_cells = cells[start:stop].reshape(number_of_rounds, -1)
+		columns = {"Bale": _bales(flight_cells.shape[1])}
+		for round_number in range(number_of_rounds):
+			columns[f"Round {round_number + 1}"] = flight_cells[round_number]
+		final_lineups[divisions[start]][int(flights[start])] = pd.DataFrame(columns, index=pd.RangeIndex(start=1, stop=1 + flight_cells.shape[1]))
+	return final_lineups
 
-def create_berger_matrix (number_of_competitors : int):
+def combined_frame(registry : ArcherRegistry, table : pd.DataFrame) -> pd.DataFrame:
 	"""
-	Makes the n-1 n-1 table, matchups where i == j are against player n
-	:param number_of_competitors:
+	Renders a match_table straight into the flights_frame layout, one Bale, Round 1..N, Division, Flight Number row per
+	match of a flight, without building the per-flight frames. Rounds a shorter flight doesn't have are left empty.
+	:param registry:
+	:param table:
 	:return:
 	"""
-	return [step_list_circular(list(range(1, number_of_competitors)), i) for i in range(number_of_competitors - 1)]
+	blocks = _flight_blocks(table)
+	starts = blocks[:-1]
+	pairs = table["Match"].to_numpy()[blocks[1:] - 1] if len(table) else np.zeros(0, dtype=np.int32)
+	offsets = np.concatenate([[0], np.cumsum(pairs)])
+	flight = np.repeat(np.arange(len(starts)), np.diff(blocks))
+	row = offsets[flight] + table["Match"].to_numpy() - 1
+
+	number_of_rounds = int(table["Round"].max()) if len(table) else 0
+	cells = np.full((int(offsets[-1]), number_of_rounds), np.nan, dtype=object)
+	cells[row, table["Round"].to_numpy() - 1] = _matchup_cells(registry, table)
 
-def rr_convolute(number_of_competitors : int, algorithm : str = "berger") -> List[List[Tuple[int,int]]]:
+	first_round = table["Round"].to_numpy() == 1
+	columns = {"Bale": table["Bale"][first_round].to_numpy()}
+	for round_number in range(number_of_rounds):
+		columns[f"Round {round_number + 1}"] = cells[:, round_number]
+	columns["Division"] = table["Division"][first_round].to_numpy()
+	columns["Flight Number"] = table["Flight Number"][first_round].to_numpy().astype(np.int64)
+	combined = pd.DataFrame(columns)
+	for column in ("Bale", "Division"):
+		combined[column] = pd.Categorical(combined[column], categories=table[column].cat.categories)
+	return combined
+
+@profiling.timed("match_individuals")
+def match_individuals(scores : pd.DataFrame, people_per_flight : Union[int, List[int]] = 8, algorithm : str = "berger", workers : Optional[int] = None, partition : str = "fixed") -> Dict[str, Dict[str, pd.DataFrame]]:
 	"""
-	produce an array of number_of_rounds arrays
-	Going to use berger table algorithm
-	:param number_of_competitors:
+	Give everyone seeds, match top to bottom seeds, and create a fake 'Seed 0' Bye archer for odd numbers
+	:param scores:
+	:param people_per_flight: one size for every division or one entry per division, in sorted division order
+	:param algorithm: "berger" or "circle" for a full round robin per flight, or "swiss" for round 1 of a Swiss event per division
+	:param workers: build flight schedules on a process pool of this many workers
+	:param partition: "fixed" or "balanced" flight sizes, see flight_sizes
 	:return:
 	"""
-	assert not number_of_competitors % 2, "The number of competitors in a flight should be even."
-	number_of_rounds = (number_of_competitors - 1)
+	if workers is None or workers <= 1:
+		registry, table = match_table(scores, people_per_flight, algorithm, partition)
+		with profiling.stage("render", matches=len(table)):
+			return lineup_frames(registry, table)
 
-	versus : List[List[Tuple[int,int]]] = [[] for _ in range(number_of_rounds)]
+	if algorithm == "swiss":
+		# Swiss pairs a whole division at once, so it is never cut into flights
+		people_per_flight = max(len(scores), 1)
+	flight_dict = split_flights(scores, people_per_flight, partition)
+	jobs = [
+		(division, flight, flight_names)
+		for division, flights in flight_dict.items()
+		for flight, flight_names in flights.items()
+	]
+	profiling.count("flights", len(jobs))
 
-	match algorithm:
-		case "berger":
-			matchups = create_berger_matrix(number_of_competitors)
-			for i in range(number_of_competitors - 1):
-				for j in range(i, number_of_competitors - 1):
-					pair = (i + 1, j + 1)
-					if i == j:
-						pair = (i + 1, number_of_competitors)
-					versus[matchups[i][j] - 1].append(pair)
-		case _ :
-			assert False, f"{algorithm} has not been implemented."
-	return versus
+	all_flight_names = [flight_names for _, _, flight_names in jobs]
+	schedule = swiss if algorithm == "swiss" else rr
+	if len(jobs) > 1:
+		with profiling.stage("schedule_pool", workers=workers), ProcessPoolExecutor(max_workers=workers, initializer=templates.configure, initargs=templates.settings()) as executor:
+			lineups = list(executor.map(schedule, all_flight_names, repeat(algorithm), chunksize=max(1, len(jobs) // (4 * workers))))
+	else:
+		lineups = [schedule(flight_names, algorithm) for flight_names in all_flight_names]
 
-def build_matches(names : List[str], matchups : List[List[Tuple[int,int]]]) -> pd.DataFrame:
+	for (division, flight, _), lineup in zip(jobs, lineups):
+		flight_dict[division][flight] = lineup
+	return flight_dict
+
+def flights_frame(final_matchups : Dict[str, Dict[int, pd.DataFrame]]) -> pd.DataFrame:
 	"""
-	Build matches from a list of names, assumed sorted by scores, and matchup info from rr_convolute. Returns a dataframe with the rounds.
-	:param names:
+	Every flight from match_individuals in one frame with Division and Flight Number columns
+	:param final_matchups:
+	:return:
+	"""
+	frames = [
+		flights.assign(**{"Division": division, "Flight Number": flight_number})
+		for division, flight_info in final_matchups.items()
+		for flight_number, flights in flight_info.items()
+	]
+	if not frames:
+		return pd.DataFrame(columns=["Bale", "Division", "Flight Number"])
+	return pd.concat(frames, ignore_index=True)
+
+def match_index_table(matchups : Union[np.ndarray, List[List[Tuple[int,int]]]]) -> np.ndarray:
+	"""
+	Pack matchup info from rr_convolute into a (rounds, pairs, 2) integer array of 1-based indices.
+	Rounds with fewer pairs are padded with 0, which build_matches renders as an empty cell.
 	:param matchups:
 	:return:
 	"""
-	final_lineup = pd.DataFrame(columns = ["Bale"])
+	if isinstance(matchups, np.ndarray):
+		return matchups
+
+	number_of_pairs = max((len(round_info) for round_info in matchups), default=0)
+	table = np.zeros((len(matchups), number_of_pairs, 2), dtype=np.int32)
 	for round_number, round_info in enumerate(matchups):
-		round_names = []
-		for pair in round_info:
-			round_name = f"{names[pair[0] - 1]} vs {names[pair[1] - 1]}"
-			round_names.append(round_name)
-		if len(final_lineup) < len(round_names):
-			final_lineup = final_lineup.reindex(range(len(round_names)))
-		elif len(round_names) < len(final_lineup):
-			round_names += [None] * (len(final_lineup) - len(round_names))
-		final_lineup[f"Round {round_number + 1}"] = round_names
-	final_lineup["Bale"] = ["A vs B" if i % 2 == 0 else "C vs D" for i in range(len(final_lineup))]
-	final_lineup.index = pd.RangeIndex(start=1, stop=1 + len(final_lineup))
-	return final_lineup
+		if round_info:
+			table[round_number, :len(round_info)] = round_info
+	return table
+
+def format_matches(names : List[str], table : np.ndarray) -> np.ndarray:
+	"""
+	Turn an index table from match_index_table into a (rounds, pairs) object array of "X vs Y" strings
+	:param names:
+	:param table:
+	:return:
+	"""
+	lookup = np.empty(len(names) + 1, dtype=object)
+	lookup[0] = None
+	lookup[1:] = [str(name) for name in names]
+
+	cells = np.full(table.shape[:2], None, dtype=object)
+	filled = (table[..., 0] > 0) & (table[..., 1] > 0)
+	cells[filled] = lookup[table[..., 0][filled]] + " vs " + lookup[table[..., 1][filled]]
+	return cells
+
+def _bales(number_of_pairs : int) -> np.ndarray:
+	return np.asarray(LANES, dtype=object)[np.arange(number_of_pairs) % len(LANES)]
+
+def build_matches(names : List[str], matchups : Union[np.ndarray, List[List[Tuple[int,int]]]]) -> pd.DataFrame:
+	"""
+	Build matches from a list of names, assumed sorted by scores, and matchup info from rr_convolute. Returns a dataframe with the rounds.
+	:param names:
+	:param matchups: nested (first, second) lists or a (rounds, pairs, 2) array
+	:return:
+	"""
+	table = match_index_table(matchups)
+	cells = format_matches(names, table)
+	number_of_pairs = table.shape[1]
+
+	columns = {"Bale": _bales(number_of_pairs)}
+	for round_number in range(table.shape[0]):
+		columns[f"Round {round_number + 1}"] = cells[round_number]
+	return pd.DataFrame(columns, index=pd.RangeIndex(start=1, stop=1 + number_of_pairs))
+
+def iter_round_lineups(names : List[str], algorithm : str = "berger", rounds : Optional[List[int]] = None) -> Iterator[pd.DataFrame]:
+	"""
+	Yields one Bale/Round N frame per round of a flight, each computed directly in O(n), so a flight of thousands never holds the whole schedule
+	:param names:
+	:param algorithm:
+	:param rounds: 1-based round numbers to produce, defaults to all of them in order
+	:return:
+	"""
+	rounds = range(1, len(names)) if rounds is None else rounds
+	for round_number in rounds:
+		cells = format_matches(names, schedule_round(len(names), round_number - 1, algorithm)[None])[0]
+		yield pd.DataFrame(
+			{"Bale": _bales(len(cells)), f"Round {round_number}": cells},
+			index=pd.RangeIndex(start=1, stop=1 + len(cells))
+		)
 
 def rr(names : List[str], algorithm : str = "berger") -> pd.DataFrame:
-	matchups = rr_convolute(number_of_competitors = len(names), algorithm = algorithm)
-	final_lineup = build_matches(names, matchups)
-	return final_lineup
\ No newline at end of file
+	with profiling.stage("template", flight_size=len(names)):
+		matchups = templates.get_template(number_of_competitors = len(names), algorithm = algorithm)
+	with profiling.stage("build_matches", flight_size=len(names)):
+		final_lineup = build_matches(names, matchups)
+	return final_lineup
+
+def swiss_lineup(pairs : List[Tuple[str, str]], round_number : int = 1) -> pd.DataFrame:
+	"""
+	One Swiss round from SwissTournament.pair_next_round as a Bale/Round N frame
+	:param pairs:
+	:param round_number:
+	:return:
+	"""
+	cells = [f"{first} vs {second}" for first, second in pairs]
+	return pd.DataFrame(
+		{"Bale": _bales(len(cells)), f"Round {round_number}": cells},
+		index=pd.RangeIndex(start=1, stop=1 + len(cells))
+	)
+
+def swiss(names : List[str], algorithm : str = "swiss") -> pd.DataFrame:
+	"""
+	Round 1 of a Swiss event for a whole division, top half against bottom half.
+	Later rounds depend on results, so they come from a SwissTournament kept across rounds.
+	:param names: seed order, best first
+	:param algorithm: unused, matches rr
+	:return:
+	"""
+	tournament = SwissTournament([name for name in names if name != BYE])
+	return swiss_lineup(tournament.pair_next_round())
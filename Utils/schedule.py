@@ -0,0 +1,204 @@
+import argparse
+import sys
+import numpy as np
+from typing import Iterator, List, Optional, Tuple
+
+ALGORITHMS = ("berger", "circle")
+
+def _index_dtype(number_of_competitors : int):
+	"""
+	Smallest signed integer dtype that can hold a 1-based competitor number
+	:param number_of_competitors:
+	:return:
+	"""
+	return np.int16 if number_of_competitors <= np.iinfo(np.int16).max else np.int32
+
+def berger_table(number_of_competitors : int) -> np.ndarray:
+	"""
+	Berger table as a (rounds, pairs, 2) array of 1-based competitor numbers.
+	Player i meets player j in round (i + j) mod (n - 1), and the diagonal i == j is the game against player n.
+	Pairs inside a round are ordered by the first player, which is the order the old row-rotation table produced.
+	:param number_of_competitors:
+	:return:
+	"""
+	number_of_rounds = number_of_competitors - 1
+	dtype = _index_dtype(number_of_competitors)
+
+	first = np.arange(number_of_rounds, dtype=dtype)[None, :]
+	rounds = np.arange(number_of_rounds, dtype=dtype)[:, None]
+	second = (rounds - first) % number_of_rounds
+
+	# every round keeps exactly n / 2 cells on or above the diagonal
+	mask = second >= first
+	shape = (number_of_rounds, number_of_competitors // 2)
+	first = np.broadcast_to(first, mask.shape)[mask].reshape(shape)
+	second = second[mask].reshape(shape)
+
+	table = np.empty(shape + (2,), dtype=dtype)
+	table[..., 0] = first + 1
+	table[..., 1] = np.where(first == second, number_of_competitors, second + 1)
+	return table
+
+def circle_table(number_of_competitors : int) -> np.ndarray:
+	"""
+	Circle method as a (rounds, pairs, 2) array of 1-based competitor numbers, home player first.
+	Player n stays fixed while the others rotate one seat per round. The fixed player's game alternates home and away
+	and every other pairing flips with its distance from the rotation point, so each player is at home n / 2 - 1 or n / 2 times.
+	:param number_of_competitors:
+	:return:
+	"""
+	number_of_rounds = number_of_competitors - 1
+	dtype = _index_dtype(number_of_competitors)
+	# rounds + offsets reaches 1.5n before the modulo, past int16 once n is above 21845
+	work_dtype = _index_dtype(number_of_competitors + number_of_competitors // 2)
+
+	rounds = np.arange(number_of_rounds, dtype=work_dtype)
+	offsets = np.arange(1, number_of_competitors // 2, dtype=work_dtype)[None, :]
+	up = (rounds[:, None] + offsets) % number_of_rounds
+	down = (rounds[:, None] - offsets) % number_of_rounds
+	flip = offsets % 2 == 1
+
+	table = np.empty((number_of_rounds, number_of_competitors // 2, 2), dtype=dtype)
+	fixed_home = rounds % 2 == 1
+	table[:, 0, 0] = np.where(fixed_home, number_of_competitors - 1, rounds)
+	table[:, 0, 1] = np.where(fixed_home, rounds, number_of_competitors - 1)
+	table[:, 1:, 0] = np.where(flip, down, up)
+	table[:, 1:, 1] = np.where(flip, up, down)
+	table += 1
+	return table
+
+def schedule_table(number_of_competitors : int, algorithm : str = "berger") -> np.ndarray:
+	"""
+	Whole round robin as one (number_of_competitors - 1, number_of_competitors / 2, 2) integer array of 1-based competitor numbers
+	:param number_of_competitors:
+	:param algorithm: "berger" or "circle"
+	:return:
+	"""
+	assert not number_of_competitors % 2, "The number of competitors in a flight should be even."
+
+	match algorithm:
+		case "berger":
+			return berger_table(number_of_competitors)
+		case "circle":
+			return circle_table(number_of_competitors)
+		case _ :
+			assert False, f"{algorithm} has not been implemented."
+
+def berger_round(number_of_competitors : int, round_number : int) -> np.ndarray:
+	"""
+	Row round_number (0-based) of berger_table as a (pairs, 2) array, in O(n) time and memory
+	:param number_of_competitors:
+	:param round_number:
+	:return:
+	"""
+	number_of_rounds = number_of_competitors - 1
+	dtype = _index_dtype(number_of_competitors)
+
+	first = np.arange(number_of_rounds, dtype=dtype)
+	second = (round_number - first) % number_of_rounds
+	mask = second >= first
+	first, second = first[mask], second[mask]
+
+	pairs = np.empty((len(first), 2), dtype=dtype)
+	pairs[:, 0] = first + 1
+	pairs[:, 1] = np.where(first == second, number_of_competitors, second + 1)
+	return pairs
+
+def circle_round(number_of_competitors : int, round_number : int) -> np.ndarray:
+	"""
+	Row round_number (0-based) of circle_table as a (pairs, 2) array, in O(n) time and memory
+	:param number_of_competitors:
+	:param round_number:
+	:return:
+	"""
+	number_of_rounds = number_of_competitors - 1
+	dtype = _index_dtype(number_of_competitors)
+
+	offsets = np.arange(1, number_of_competitors // 2, dtype=np.int64)
+	up = (round_number + offsets) % number_of_rounds
+	down = (round_number - offsets) % number_of_rounds
+	flip = offsets % 2 == 1
+
+	pairs = np.empty((number_of_competitors // 2, 2), dtype=dtype)
+	fixed_home = round_number % 2 == 1
+	pairs[0] = (number_of_competitors - 1, round_number) if fixed_home else (round_number, number_of_competitors - 1)
+	pairs[1:, 0] = np.where(flip, down, up)
+	pairs[1:, 1] = np.where(flip, up, down)
+	return pairs + 1
+
+def schedule_round(number_of_competitors : int, round_number : int, algorithm : str = "berger") -> np.ndarray:
+	"""
+	One round of schedule_table computed directly, without building the others
+	:param number_of_competitors:
+	:param round_number: 0-based
+	:param algorithm: "berger" or "circle"
+	:return:
+	"""
+	assert not number_of_competitors % 2, "The number of competitors in a flight should be even."
+	assert 0 <= round_number < number_of_competitors - 1, f"A flight of {number_of_competitors} only has {number_of_competitors - 1} rounds."
+
+	match algorithm:
+		case "berger":
+			return berger_round(number_of_competitors, round_number)
+		case "circle":
+			return circle_round(number_of_competitors, round_number)
+		case _ :
+			assert False, f"{algorithm} has not been implemented."
+
+def iter_rounds(number_of_competitors : int, algorithm : str = "berger", start : int = 0, stop : Optional[int] = None) -> Iterator[np.ndarray]:
+	"""
+	Yields rounds start..stop - 1 (0-based) one at a time, so only one round is ever held
+	:param number_of_competitors:
+	:param algorithm:
+	:param start:
+	:param stop: defaults to the last round
+	:return:
+	"""
+	stop = number_of_competitors - 1 if stop is None else stop
+	for round_number in range(start, stop):
+		yield schedule_round(number_of_competitors, round_number, algorithm)
+
+def rr_convolute(number_of_competitors : int, algorithm : str = "berger") -> List[List[Tuple[int,int]]]:
+	"""
+	produce an array of number_of_rounds arrays of 1-based (first, second) pairs
+	:param number_of_competitors:
+	:param algorithm: "berger" or "circle"
+	:return:
+	"""
+	table = schedule_table(number_of_competitors, algorithm)
+	return [[tuple(pair) for pair in round_info] for round_info in table.tolist()]
+
+def round_lines(names : List[str], algorithm : str = "berger", rounds : Optional[List[int]] = None) -> Iterator[str]:
+	"""
+	Round, Match, Bale and "X vs Y" as tab separated lines, one per match, without pandas. An odd field gets a 'BYE'.
+	:param names: seed order, best first
+	:param algorithm:
+	:param rounds: 1-based round numbers, defaults to all of them
+	:return:
+	"""
+	names = list(names) + ["BYE"] * (len(names) % 2)
+	rounds = range(1, len(names)) if rounds is None else rounds
+	for round_number in rounds:
+		for match, (first, second) in enumerate(schedule_round(len(names), round_number - 1, algorithm).tolist(), start=1):
+			bale = "A vs B" if match % 2 else "C vs D"
+			yield f"{round_number}\t{match}\t{bale}\t{names[first - 1]} vs {names[second - 1]}"
+
+if __name__ == "__main__":
+	# lightweight entry point: python -m Utils.schedule Alice Bob Carol Dave, or -n 8, or names on stdin with -
+	argparser = argparse.ArgumentParser(prog="python -m Utils.schedule")
+	argparser.add_argument("names", nargs="*", help="archers in seed order, best first; - reads one per line from stdin")
+	argparser.add_argument("-n", "--number", type=int, default=None, help="number the archers 1..n instead of naming them")
+	argparser.add_argument("-a", "--algorithm", default="berger", choices=ALGORITHMS)
+	argparser.add_argument("-r", "--rounds", type=int, nargs="+", default=None, help="only these 1-based rounds")
+	args = argparser.parse_args()
+
+	if args.number is not None:
+		names = [str(i) for i in range(1, args.number + 1)]
+	elif args.names == ["-"]:
+		names = [line.strip() for line in sys.stdin if line.strip()]
+	else:
+		names = args.names
+	assert len(names) >= 2, "A flight needs at least two archers."
+
+	sys.stdout.write("Round\tMatch\tBale\tMatchup\n")
+	sys.stdout.writelines(line + "\n" for line in round_lines(names, args.algorithm, args.rounds))
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+from . import templates
+
+# parsed score files kept per worker process, keyed by path, size and modification time
+SCORE_CACHE_SIZE = 32
+_scores : "OrderedDict[Tuple, object]" = OrderedDict()
+
+def _load(params : Dict):
+	"""
+	Scores for a job, from inline rows or a score file that stays parsed in this worker until it changes
+	:param params:
+	:return:
+	"""
+	import pandas as pd
+	from .loader import load_scores, validate
+
+	if "scores" in params:
+		scores = pd.DataFrame(params["scores"])
+	else:
+		path = params["score_file"]
+		stat = os.stat(path)
+		key = (path, stat.st_size, stat.st_mtime_ns, bool(params.get("typed", False)))
+		if key in _scores:
+			_scores.move_to_end(key)
+		else:
+			_scores[key] = load_scores(path, typed=key[3])
+			if len(_scores) > SCORE_CACHE_SIZE:
+				_scores.popitem(last=False)
+		scores = _scores[key]
+
+	report = validate(scores)
+	if params.get("remove_errors", False):
+		scores = report.drop(scores)
+	return scores, report
+
+def _records(frame) -> list:
+	# empty cells become null rather than NaN, which isn't valid JSON
+	return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+def run_job(endpoint : str, params : Dict) -> Dict:
+	"""
+	One matcher call in a pool worker, returned as plain JSON-ready values so the event loop only serialises
+	:param endpoint: "match_individuals" or "match_teams"
+	:param params: request body
+	:return:
+	"""
+	from .rr_matcher import match_individuals
+	from .elim_matcher import match_teams
+
+	scores, report = _load(params)
+	response = {"messages": report.messages(scores) if not params.get("remove_errors", False) else []}
+	match endpoint:
+		case "match_individuals":
+			final_matchups = match_individuals(scores, people_per_flight=params.get("people_per_flight", 4), algorithm=params.get("algorithm", "berger"), partition=params.get("partition", "fixed"))
+			response["divisions"] = {
+				str(division): {
+					str(flight): _records(matchups.reset_index(names="Match"))
+					for flight, matchups in flight_info.items()
+				}
+				for division, flight_info in final_matchups.items()
+			}
+		case "match_teams":
+			final_teams = match_teams(
+				scores,
+				people_per_team=params.get("people_per_team", 2),
+				rng=params.get("seed"),
+				balance=params.get("balance", "serpentine"),
+				time_budget=params.get("time_budget", 0.25),
+			)
+			response["divisions"] = {str(division): teams.strings() for division, teams in final_teams.items()}
+		case _ :
+			assert False, f"{endpoint} has not been implemented."
+	return response
+
+class MatchService:
+	"""
+	match_individuals and match_teams over HTTP/JSON. Jobs run on a bounded process pool whose workers keep schedule
+	templates and parsed score files warm, and identical requests that arrive while one is running share its result.
+	"""
+	ENDPOINTS = ("match_individuals", "match_teams")
+
+	def __init__(self, workers : Optional[int] = None, template_dir : Optional[str] = None, max_pending : Optional[int] = None):
+		self.workers = workers or os.cpu_count() or 1
+		self.template_dir = template_dir
+		self.pending = asyncio.Semaphore(max_pending or 4 * self.workers)
+		self.inflight : Dict[str, asyncio.Future] = {}
+		self.executor : Optional[ProcessPoolExecutor] = None
+		self.stats = {"requests": 0, "coalesced": 0, "jobs": 0, "errors": 0}
+
+	def start(self):
+		if self.template_dir is not None:
+			templates.configure(directory=self.template_dir)
+			templates.warm()
+		# spawned rather than forked, so workers never inherit (and hold open) client sockets of the event loop
+		self.executor = ProcessPoolExecutor(
+			max_workers=self.workers,
+			mp_context=multiprocessing.get_context("spawn"),
+			initializer=templates.configure,
+			initargs=templates.settings()
+		)
+
+	def close(self):
+		if self.executor is not None:
+			self.executor.shutdown(cancel_futures=True)
+			self.executor = None
+
+	@staticmethod
+	def request_key(endpoint : str, params : Dict) -> str:
+		"""
+		Requests with the same endpoint and body, for an unchanged score file, have the same key
+		:param endpoint:
+		:param params:
+		:return:
+		"""
+		stat = None
+		if "score_file" in params and os.path.exists(params["score_file"]):
+			file_stat = os.stat(params["score_file"])
+			stat = (file_stat.st_size, file_stat.st_mtime_ns)
+		return json.dumps([endpoint, params, stat], sort_keys=True, default=str)
+
+	async def _run(self, endpoint : str, params : Dict) -> Dict:
+		async with self.pending:
+			self.stats["jobs"] += 1
+			return await asyncio.get_running_loop().run_in_executor(self.executor, run_job, endpoint, params)
+
+	async def call(self, endpoint : str, params : Dict) -> Dict:
+		"""
+		Runs a job, or waits on the identical one already running
+		:param endpoint:
+		:param params:
+		:return:
+		"""
+		key = self.request_key(endpoint, params)
+		future = self.inflight.get(key)
+		if future is not None:
+			self.stats["coalesced"] += 1
+			return await asyncio.shield(future)
+
+		future = asyncio.ensure_future(self._run(endpoint, params))
+		self.inflight[key] = future
+		future.add_done_callback(lambda _: self.inflight.pop(key, None))
+		return await asyncio.shield(future)
+
+	async def handle(self, method : str, path : str, body : bytes) -> Tuple[int, Dict]:
+		"""
+		Routes one request to a status code and a JSON body
+		:param method:
+		:param path:
+		:param body:
+		:return:
+		"""
+		self.stats["requests"] += 1
+		endpoint = path.strip("/").split("?")[0]
+		if method == "GET" and endpoint == "health":
+			return HTTPStatus.OK, {"status": "ok", "workers": self.workers, "inflight": len(self.inflight), **self.stats}
+		if endpoint not in self.ENDPOINTS:
+			return HTTPStatus.NOT_FOUND, {"error": f"{path} not found"}
+		if method != "POST":
+			return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}
+
+		try:
+			params = json.loads(body or b"{}")
+			assert isinstance(params, dict), "The request body should be a JSON object."
+			assert "scores" in params or "score_file" in params, "Send scores rows or a score_file path."
+		except (ValueError, AssertionError) as e:
+			return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+
+		try:
+			return HTTPStatus.OK, await self.call(endpoint, params)
+		except (AssertionError, FileNotFoundError, KeyError, ValueError) as e:
+			self.stats["errors"] += 1
+			return HTTPStatus.BAD_REQUEST, {"error": f"{type(e).__name__}: {e}"}
+		except Exception as e:
+			self.stats["errors"] += 1
+			return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+
+	async def _connection(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter):
+		try:
+			request_line = await reader.readline()
+			if not request_line:
+				return
+			method, path, _ = request_line.decode("latin-1").split(" ", 2)
+			headers = {}
+			while True:
+				line = await reader.readline()
+				if line in (b"\r\n", b"\n", b""):
+					break
+				name, _, value = line.decode("latin-1").partition(":")
+				headers[name.strip().lower()] = value.strip()
+			body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+			status, payload = await self.handle(method, path, body)
+			data = json.dumps(payload).encode("utf-8")
+			writer.write(
+				f"HTTP/1.1 {int(status)} {HTTPStatus(status).phrase}\r\n"
+				f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data
+			)
+			await writer.drain()
+		except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+			pass
+		finally:
+			writer.close()
+
+	async def serve(self, host : str = "127.0.0.1", port : int = 8765):
+		"""
+		Serves until cancelled
+		:param host:
+		:param port:
+		:return:
+		"""
+		self.start()
+		try:
+			server = await asyncio.start_server(self._connection, host, port)
+			async with server:
+				await server.serve_forever()
+		finally:
+			self.close()
@@ -0,0 +1,198 @@
+import itertools
+import json
+import math
+from collections import deque
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Tuple
+from . import profiling
+
+if TYPE_CHECKING:
+	import pandas as pd
+
+BYE = "BYE"
+
+def swiss_rounds(number_of_competitors : int) -> int:
+	"""
+	Rounds needed to leave a single unbeaten archer, ceil(log2 n)
+	:param number_of_competitors:
+	:return:
+	"""
+	return max(1, math.ceil(math.log2(max(number_of_competitors, 2))))
+
+def _key(first : int, second : int) -> Tuple[int, int]:
+	return (first, second) if first < second else (second, first)
+
+def _repair(pairs : List[List[int]], first : int, second : int, played : Set[Tuple[int, int]]) -> bool:
+	"""
+	Swaps first and second into an existing pair, lowest ranked pair first, when that removes their rematch
+	:param pairs: changed in place
+	:param first:
+	:param second:
+	:param played:
+	:return: whether a swap was found
+	"""
+	for pair in reversed(pairs):
+		a, b = pair
+		if _key(first, a) not in played and _key(second, b) not in played:
+			pair[1] = first
+			pairs.append([b, second])
+			return True
+		if _key(first, b) not in played and _key(second, a) not in played:
+			pair[0] = first
+			pairs.append([a, second])
+			return True
+	return False
+
+def swiss_pairings(points : Sequence[float], played : Set[Tuple[int, int]] = frozenset(), had_bye : Optional[Sequence[bool]] = None) -> Tuple[np.ndarray, int]:
+	"""
+	Pairs one Swiss round for players given in seed order, position 0 being the top seed.
+	Players are ranked by points, then seed, and paired inside each score group top half against bottom half.
+	A player whose half-partner would be a rematch takes the next bottom-half player instead, and anyone left
+	over floats down into the next group, so a round costs about O(n) and never searches every matching.
+	The bye goes to the lowest ranked player who hasn't had one.
+	:param points: running score per player
+	:param played: (lower, higher) position pairs that have already met
+	:param had_bye:
+	:return: (pairs, 2) array of positions, higher ranked first, and the position with the bye or -1
+	"""
+	number_of_competitors = len(points)
+	points = np.asarray(points, dtype=float)
+	order = np.lexsort((np.arange(number_of_competitors), -points)).tolist()
+	rank = np.empty(number_of_competitors, dtype=np.int64)
+	rank[order] = np.arange(number_of_competitors)
+
+	bye = -1
+	if number_of_competitors % 2:
+		had_bye = np.zeros(number_of_competitors, dtype=bool) if had_bye is None else np.asarray(had_bye, dtype=bool)
+		bye = next((position for position in reversed(order) if not had_bye[position]), order[-1])
+		order.remove(bye)
+
+	pairs = []
+	floaters = []
+	for _, group in itertools.groupby(order, key=lambda position: points[position]):
+		group = floaters + list(group)
+		half = len(group) // 2
+		bottom = group[half:]
+		taken = set()
+		start = 0
+		for position in group[:half]:
+			# skip the already paired front of the bottom half so a clean round stays linear
+			while start < len(bottom) and bottom[start] in taken:
+				start += 1
+			opponent = next((bottom[i] for i in range(start, len(bottom)) if bottom[i] not in taken and _key(position, bottom[i]) not in played), None)
+			if opponent is not None:
+				taken.update((position, opponent))
+				pairs.append([position, opponent])
+		floaters = [position for position in group if position not in taken]
+
+	# whoever floats out of the last group pairs among themselves, swapping into earlier pairs to dodge rematches
+	floaters = deque(floaters)
+	while floaters:
+		position = floaters.popleft()
+		opponent = next((other for other in floaters if _key(position, other) not in played), None)
+		if opponent is not None:
+			floaters.remove(opponent)
+			pairs.append([position, opponent])
+			continue
+		opponent = floaters.popleft()
+		if not _repair(pairs, position, opponent, played):
+			profiling.count("swiss_rematches")
+			pairs.append([position, opponent])
+
+	table = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+	# higher ranked first, pairs in board order
+	table = np.where((rank[table[:, :1]] > rank[table[:, 1:]]), table[:, ::-1], table)
+	table = table[np.argsort(rank[table[:, 0]], kind="stable")]
+	return table, bye
+
+class SwissTournament:
+	"""
+	Running state of a Swiss event for one division: points, who has met whom and who has had a bye.
+	Names are given in seed order, best first. A bye is worth a win, and a win 1, a draw 0.5 and a loss 0.
+	"""
+
+	def __init__(self, names : Sequence[str], rounds : Optional[int] = None):
+		self.names = list(names)
+		self.rounds = swiss_rounds(len(self.names)) if rounds is None else rounds
+		self.positions = {name: position for position, name in enumerate(self.names)}
+		self.points = np.zeros(len(self.names))
+		self.had_bye = np.zeros(len(self.names), dtype=bool)
+		self.played : Set[Tuple[int, int]] = set()
+		self.opponents = np.full(len(self.names), -1, dtype=np.int64)  # latest round, -1 for the bye
+		self.history : List[List[Tuple[int, int]]] = []  # per round, a bye is (position, -1)
+
+	@property
+	def rounds_played(self) -> int:
+		return len(self.history)
+
+	def pair_next_round(self) -> List[Tuple[str, str]]:
+		"""
+		Pairs and records the next round from the current points
+		:return: (higher ranked, lower ranked) name pairs in board order, with the bye last as (name, 'BYE')
+		"""
+		assert self.rounds_played < self.rounds, f"All {self.rounds} rounds have been paired."
+		table, bye = swiss_pairings(self.points, self.played, self.had_bye)
+		round_pairs = [tuple(pair) for pair in table.tolist()]
+		self.played.update(_key(first, second) for first, second in round_pairs)
+		self.opponents[table[:, 0]] = table[:, 1]
+		self.opponents[table[:, 1]] = table[:, 0]
+		if bye >= 0:
+			self.had_bye[bye] = True
+			self.points[bye] += 1
+			self.opponents[bye] = -1
+			round_pairs.append((bye, -1))
+		self.history.append(round_pairs)
+		return [(self.names[first], BYE if second < 0 else self.names[second]) for first, second in round_pairs]
+
+	def record_result(self, first : str, second : str, first_points : float):
+		"""
+		Scores a match of the latest round
+		:param first:
+		:param second:
+		:param first_points: 1 for a win by first, 0.5 for a draw, 0 for a loss
+		:return:
+		"""
+		assert first_points in (0, 0.5, 1), f"{first_points} is not a valid result."
+		a, b = self.positions[first], self.positions[second]
+		assert self.history and self.opponents[a] == b, f"{first} and {second} didn't meet in round {self.rounds_played}."
+		self.points[a] += first_points
+		self.points[b] += 1 - first_points
+
+	def standings(self) -> "pd.DataFrame":
+		"""
+		Name, Seed and Points, best first, ties kept in seed order
+		:return:
+		"""
+		import pandas as pd
+		standings = pd.DataFrame({"Name": self.names, "Seed": np.arange(1, len(self.names) + 1), "Points": self.points})
+		return standings.sort_values(by="Points", ascending=False, kind="stable").reset_index(drop=True)
+
+	def to_dict(self) -> Dict:
+		return {
+			"names": self.names,
+			"rounds": self.rounds,
+			"points": self.points.tolist(),
+			"had_bye": self.had_bye.tolist(),
+			"history": [[list(pair) for pair in round_pairs] for round_pairs in self.history],
+		}
+
+	@classmethod
+	def from_dict(cls, state : Dict) -> "SwissTournament":
+		tournament = cls(state["names"], state["rounds"])
+		tournament.points = np.asarray(state["points"], dtype=float)
+		tournament.had_bye = np.asarray(state["had_bye"], dtype=bool)
+		tournament.history = [[tuple(pair) for pair in round_pairs] for round_pairs in state["history"]]
+		tournament.played = {_key(first, second) for round_pairs in tournament.history for first, second in round_pairs if second >= 0}
+		for first, second in tournament.history[-1] if tournament.history else []:
+			tournament.opponents[first] = second
+			if second >= 0:
+				tournament.opponents[second] = first
+		return tournament
+
+def save_tournaments(path : str, tournaments : Dict[str, SwissTournament]):
+	with open(path, "w", encoding="utf-8") as f:
+		json.dump({division: tournament.to_dict() for division, tournament in tournaments.items()}, f)
+
+def load_tournaments(path : str) -> Dict[str, SwissTournament]:
+	with open(path, encoding="utf-8") as f:
+		return {division: SwissTournament.from_dict(state) for division, state in json.load(f).items()}
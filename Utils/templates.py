@@ -0,0 +1,103 @@
+import os
+import numpy as np
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+from .schedule import ALGORITHMS, schedule_table
+
+DEFAULT_CACHE_SIZE = 64
+
+class TemplateStore:
+	"""
+	On-disk schedule templates, one {algorithm}_{n}.npy per flight size, opened memory-mapped
+	"""
+	def __init__(self, directory : str):
+		self.directory = directory
+		os.makedirs(directory, exist_ok=True)
+
+	def path(self, number_of_competitors : int, algorithm : str) -> str:
+		return os.path.join(self.directory, f"{algorithm}_{number_of_competitors}.npy")
+
+	def load(self, number_of_competitors : int, algorithm : str) -> Optional[np.ndarray]:
+		"""
+		Memory-mapped template, or None if it hasn't been stored yet
+		:param number_of_competitors:
+		:param algorithm:
+		:return:
+		"""
+		path = self.path(number_of_competitors, algorithm)
+		if not os.path.exists(path):
+			return None
+		return np.load(path, mmap_mode="r")
+
+	def save(self, number_of_competitors : int, algorithm : str, table : np.ndarray):
+		"""
+		Writes through a temporary file so concurrent readers never see half a template
+		:param number_of_competitors:
+		:param algorithm:
+		:param table:
+		:return:
+		"""
+		path = self.path(number_of_competitors, algorithm)
+		temporary = f"{path}.{os.getpid()}.tmp"
+		with open(temporary, "wb") as f:
+			np.save(f, table)
+		os.replace(temporary, path)
+
+_store : Optional[TemplateStore] = None
+_cache_size : Optional[int] = DEFAULT_CACHE_SIZE
+
+def _build(number_of_competitors : int, algorithm : str) -> np.ndarray:
+	if _store is not None:
+		table = _store.load(number_of_competitors, algorithm)
+		if table is not None:
+			return table
+	table = schedule_table(number_of_competitors, algorithm)
+	if _store is not None:
+		_store.save(number_of_competitors, algorithm, table)
+	table.setflags(write=False)
+	return table
+
+_cached_build = lru_cache(maxsize=DEFAULT_CACHE_SIZE)(_build)
+
+def configure(cache_size : Optional[int] = DEFAULT_CACHE_SIZE, directory : Optional[str] = None):
+	"""
+	Sets the in-process LRU bound (None for unbounded) and the on-disk store directory (None for memory only).
+	Clears the in-process cache.
+	:param cache_size:
+	:param directory:
+	:return:
+	"""
+	global _cached_build, _store, _cache_size
+	_store = TemplateStore(directory) if directory is not None else None
+	_cache_size = cache_size
+	_cached_build = lru_cache(maxsize=cache_size)(_build)
+
+def settings() -> Tuple[Optional[int], Optional[str]]:
+	"""
+	Arguments for configure that reproduce the current setup, e.g. as a process pool initializer
+	:return:
+	"""
+	return _cache_size, _store.directory if _store is not None else None
+
+def get_template(number_of_competitors : int, algorithm : str = "berger") -> np.ndarray:
+	"""
+	Read-only (rounds, pairs, 2) schedule for a flight size, from the LRU, then the store, then schedule_table
+	:param number_of_competitors:
+	:param algorithm:
+	:return:
+	"""
+	return _cached_build(number_of_competitors, algorithm)
+
+def warm(sizes : Iterable[int] = range(2, 17, 2), algorithms : Iterable[str] = ALGORITHMS):
+	"""
+	Precomputes templates so the first flights of a run don't pay for them. Odd sizes are rounded up to the BYE size.
+	:param sizes:
+	:param algorithms:
+	:return:
+	"""
+	for algorithm in algorithms:
+		for size in sizes:
+			get_template(size + size % 2, algorithm)
+
+def cache_info():
+	return _cached_build.cache_info()
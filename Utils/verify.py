@@ -0,0 +1,275 @@
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from typing import List, Optional, Sequence
+
+def schedule_problems(table : np.ndarray, number_of_competitors : Optional[int] = None) -> List[str]:
+	"""
+	Everything wrong with a (rounds, pairs, 2) round robin table of 1-based competitors, or [] when it is valid:
+	n - 1 rounds of n / 2 pairs, nobody twice in a round (per-round occupancy counts) and every pair exactly once
+	(a pair incidence matrix). Both checks are single bincounts, so a flight of n costs O(n^2), the size of the table.
+	:param table: e.g. schedule_table or get_template; a nested list from rr_convolute is converted
+	:param number_of_competitors: defaults to rounds + 1
+	:return:
+	"""
+	table = np.asarray(table)
+	number_of_competitors = table.shape[0] + 1 if number_of_competitors is None else number_of_competitors
+	n = number_of_competitors
+	if table.ndim != 3 or table.shape != (n - 1, n // 2, 2) or n % 2:
+		return [f"expected shape {(n - 1, n // 2, 2)} for an even flight of {n}, got {table.shape}"]
+	if table.size == 0:
+		return []
+
+	problems = []
+	players = table.astype(np.int64) - 1
+	if players.min() < 0 or players.max() >= n:
+		return [f"competitor numbers should be 1..{n}, found {players.min() + 1}..{players.max() + 1}"]
+
+	self_pairs = np.argwhere(players[..., 0] == players[..., 1])
+	for round_number, pair in self_pairs[:5].tolist():
+		problems.append(f"round {round_number + 1} pairs {players[round_number, pair, 0] + 1} with themselves")
+
+	rounds = np.arange(n - 1)[:, None, None]
+	occupancy = np.bincount((rounds * n + players).ravel(), minlength=(n - 1) * n).reshape(n - 1, n)
+	for round_number, player in np.argwhere(occupancy != 1)[:5].tolist():
+		problems.append(f"round {round_number + 1} has competitor {player + 1} {occupancy[round_number, player]} times")
+
+	low, high = players.min(axis=2), players.max(axis=2)
+	incidence = np.bincount((low * n + high).ravel(), minlength=n * n).reshape(n, n)
+	expected = np.triu(np.ones((n, n), dtype=np.int64), k=1)
+	for first, second in np.argwhere(incidence != expected)[:5].tolist():
+		if first < second:
+			problems.append(f"{first + 1} and {second + 1} meet {incidence[first, second]} times")
+	return problems
+
+def lineup_problems(lineup, names : Optional[Sequence[str]] = None) -> List[str]:
+	"""
+	Checks a built flight frame (build_matches, or a flight of match_individuals) against its names: every round
+	column holds each name once and every two names meet once. A 'BYE' only appears when it was added for an odd field.
+	:param lineup:
+	:param names: the flight's names, including any 'BYE'; defaults to everyone who appears in the lineup
+	:return:
+	"""
+	import pandas as pd
+
+	round_columns = [column for column in lineup.columns if str(column).startswith("Round ")]
+	cells = lineup[round_columns].to_numpy().T
+	if pd.isna(cells).any():
+		return ["the lineup has empty match cells"]
+	pairs = pd.Series(cells.ravel()).str.split(" vs ", n=1, expand=True)
+	index = pd.Index(pd.unique(pairs.to_numpy().ravel()) if names is None else names)
+	if not index.is_unique:
+		return ["names are not unique"]
+	positions = np.stack([index.get_indexer(pairs[0]), index.get_indexer(pairs[1])], axis=-1)
+	if (positions < 0).any():
+		return [f"unknown archer {pairs.to_numpy().ravel()[(positions < 0).ravel()][0]}"]
+	return schedule_problems(positions.reshape(len(round_columns), -1, 2) + 1, len(index))
+
+def table_problems(table) -> List[str]:
+	"""
+	schedule_problems for every flight of a match_table, straight from the archer ids. Ids are renumbered 1..n inside
+	each flight with one np.unique over the whole table, so only the per-flight checks loop.
+	:param table:
+	:return:
+	"""
+	import pandas as pd
+
+	if len(table) == 0:
+		return []
+	flight, flights = pd.factorize(pd.MultiIndex.from_arrays([table["Division"], table["Flight Number"]]))
+	order = np.lexsort((table["Match"].to_numpy(), table["Round"].to_numpy(), flight))
+	flight = flight[order]
+	players = np.stack([table["First"].to_numpy()[order], table["Second"].to_numpy()[order]], axis=-1).astype(np.int64)
+	_, positions = np.unique(flight[:, None] * (players.max() + 1) + players, return_inverse=True)
+	positions = positions.reshape(players.shape)
+	rounds = table["Round"].to_numpy()[order]
+
+	problems = []
+	bounds = np.searchsorted(flight, np.arange(len(flights) + 1))
+	for f, (start, stop) in enumerate(zip(bounds[:-1].tolist(), bounds[1:].tolist())):
+		flight_positions = positions[start:stop] - positions[start:stop].min()
+		number_of_rounds = int(rounds[stop - 1])
+		if (stop - start) % number_of_rounds:
+			problems.append(f"{flights[f][0]} flight {flights[f][1]}: rounds have different numbers of matches")
+			continue
+		flight_table = flight_positions.reshape(number_of_rounds, -1, 2) + 1
+		problems.extend(f"{flights[f][0]} flight {flights[f][1]}: {problem}" for problem in schedule_problems(flight_table, flight_table.shape[1] * 2))
+	return problems
+
+def teams_problems(members : np.ndarray, num_players : int, team_size : int) -> List[str]:
+	"""
+	Checks a (teams, team_size) member array padded with -1 (serpentine_teams, balanced_teams, team_members or
+	TeamTable.members): every position 0..n-1 exactly once, the fewest teams possible and team sizes one apart at most
+	:param members:
+	:param num_players:
+	:param team_size:
+	:return:
+	"""
+	members = np.asarray(members)
+	problems = []
+	num_teams = -(-num_players // team_size)
+	if members.shape != (num_teams, team_size):
+		problems.append(f"expected {num_teams} teams of {team_size} slots, got shape {members.shape}")
+	real = members[members >= 0]
+	if real.size and real.max() >= num_players:
+		return problems + [f"position {real.max()} is past the {num_players} players"]
+	counts = np.bincount(real, minlength=num_players)
+	for position in np.flatnonzero(counts != 1)[:5].tolist():
+		problems.append(f"player {position} is on {counts[position]} teams")
+	sizes = (members >= 0).sum(axis=1)
+	if sizes.size and sizes.max() - sizes.min() > 1:
+		problems.append(f"team sizes range from {sizes.min()} to {sizes.max()}")
+	if members.size and (np.diff((members < 0).astype(np.int8), axis=1) < 0).any():
+		problems.append("padding is not at the end of every team")
+	return problems
+
+def team_table_problems(team_table, qual_scores : Optional[Sequence[float]] = None) -> List[str]:
+	"""
+	teams_problems for a TeamTable, plus seeds in descending total order and, given the scores, correct totals
+	:param team_table:
+	:param qual_scores: per position in team_table.names
+	:return:
+	"""
+	members = team_table.members
+	team_size = members.shape[1] if members.ndim == 2 else 1
+	problems = teams_problems(members, len(team_table.names), team_size)
+	totals = np.asarray(team_table.totals, dtype=float)
+	if (np.diff(totals) > 0).any():
+		problems.append("teams are not ordered by descending total")
+	if qual_scores is not None and not problems:
+		points = np.asarray(qual_scores, dtype=float)
+		expected = np.where(members >= 0, points[members], 0).sum(axis=1)
+		if not np.allclose(expected, totals):
+			problems.append("team totals don't match the members' scores")
+	return problems
+
+def sweep(max_flight : int = 64, max_players : int = 200, team_sizes : Sequence[int] = (1, 2, 3, 4, 5), seed : int = 0) -> List[str]:
+	"""
+	Property sweep: every schedule engine at every even flight size up to max_flight, balanced flight sizes, every
+	team builder and bracket seeding for every field size up to max_players, on random scores drawn from seed.
+	Snake-drafted team totals must also stay well inside the spread of randomly drawn teams, and a score file missing
+	a required column must be reported by missing_columns and refused by validate.
+	:param max_flight:
+	:param max_players:
+	:param team_sizes:
+	:param seed:
+	:return: failures, [] when everything holds
+	"""
+	from .schedule import ALGORITHMS, iter_rounds, rr_convolute, schedule_table
+	from .rr_matcher import build_matches, flight_sizes
+	from .elim_matcher import balanced_teams, create_teams, serpentine_teams, team_members
+	from .swiss import SwissTournament
+	from .bracket import EMPTY, Bracket
+	from .loader import load_scores, missing_columns, validate
+
+	rng = np.random.default_rng(seed)
+	failures = []
+	spreads = {}  # team_size -> (serpentine, random) team total standard deviations per field
+
+	for n in range(2, max_flight + 1, 2):
+		names = [f"Archer{i}" for i in range(n - 1)] + ["BYE"] if n > 2 else ["Archer0", "Archer1"]
+		for algorithm in ALGORITHMS:
+			table = schedule_table(n, algorithm)
+			checks = {
+				"schedule_table": schedule_problems(table, n),
+				"rr_convolute": schedule_problems(rr_convolute(n, algorithm), n),
+				"build_matches": lineup_problems(build_matches(names, table), names),
+			}
+			if not np.array_equal(np.stack(list(iter_rounds(n, algorithm))), table):
+				checks["iter_rounds"] = ["doesn't match schedule_table"]
+			for check, problems in checks.items():
+				failures.extend(f"{check}({n}, {algorithm}): {problem}" for problem in problems)
+
+	for num_players in range(0, max_players + 1):
+		for people_per_flight in range(1, max_flight + 1):
+			fixed, balanced = flight_sizes(num_players, people_per_flight), flight_sizes(num_players, people_per_flight, "balanced")
+			padded = lambda sizes: max((size + size % 2 for size in sizes), default=0)
+			if sum(balanced) != num_players or min(balanced, default=1) < 1 or sum(size % 2 for size in balanced) != num_players % 2 or padded(balanced) > padded(fixed):
+				failures.append(f"flight_sizes({num_players}, {people_per_flight}, balanced): {balanced}")
+
+		points = rng.integers(0, 300, num_players).astype(float)
+		for team_size in team_sizes:
+			builders = {
+				"serpentine_teams": serpentine_teams(num_players, team_size, rng),
+				"balanced_teams": balanced_teams(points, team_size, time_budget=0.0),
+				"team_members": team_members(rng.permutation(num_players), team_size),
+			}
+			for builder, members in builders.items():
+				problems = teams_problems(members, num_players, team_size)
+				if not problems:
+					table = create_teams([str(i) for i in range(num_players)], members, list(range(num_players)), points, team_size)
+					problems = team_table_problems(table, points)
+				failures.extend(f"{builder}({num_players}, {team_size}): {problem}" for problem in problems)
+
+			# serpentine_teams ranks positions by ascending score, so its spread is measured on sorted points
+			if num_players >= 2 * team_size > 2:
+				ranked = np.sort(points)
+				team_totals = lambda members: np.where(members >= 0, ranked[members], 0).sum(axis=1)
+				serpentine = builders["serpentine_teams"]
+				if not (serpentine == 0).any(axis=1)[(serpentine == num_players - 1).any(axis=1)].all():
+					failures.append(f"serpentine_teams({num_players}, {team_size}): the best player isn't teamed with the weakest")
+				spreads.setdefault(team_size, []).append((team_totals(serpentine).std(), team_totals(builders["team_members"]).std()))
+
+	for team_size, pairs in spreads.items():
+		serpentine, random_teams = np.mean(pairs, axis=0)
+		if serpentine > 0.4 * random_teams:
+			failures.append(f"serpentine_teams(*, {team_size}): team totals spread {serpentine:.1f}, against {random_teams:.1f} for random teams")
+
+	for num_players in range(2, max_players + 1):
+		bracket = Bracket([f"Team{i}" for i in range(num_players)])
+		leaves = bracket.slots[bracket.size:].reshape(-1, 2)
+		seeds = np.sort(leaves[leaves >= 0])
+		byes = np.sort(leaves[(leaves == EMPTY).any(axis=1)].max(axis=1))
+		if not np.array_equal(seeds, np.arange(num_players)) or (leaves == EMPTY).all(axis=1).any():
+			failures.append(f"bracket({num_players}): seeds aren't placed once each")
+		elif not np.array_equal(byes, np.arange(bracket.size - num_players)):
+			failures.append(f"bracket({num_players}): byes don't go to the top seeds")
+
+	for num_players in range(2, max_players + 1, 7):
+		tournament = SwissTournament([f"Archer{i}" for i in range(num_players)])
+		for _ in range(tournament.rounds):
+			pairs = tournament.pair_next_round()
+			seen = [name for pair in pairs for name in pair if name != "BYE"]
+			if sorted(seen) != sorted(tournament.names):
+				failures.append(f"swiss({num_players}) round {tournament.rounds_played}: not everyone plays exactly once")
+			for first, second in pairs:
+				if second != "BYE":
+					tournament.record_result(first, second, float(rng.random() < 0.5))
+		meetings = [tuple(sorted(pair)) for round_pairs in tournament.history for pair in round_pairs if pair[1] >= 0]
+		if num_players >= 2 * tournament.rounds and len(meetings) != len(set(meetings)):
+			failures.append(f"swiss({num_players}): rematch")
+
+	with tempfile.TemporaryDirectory() as directory:
+		header = ["Name", "Division"] + [f"R{i}" for i in range(1, 11)]
+		for dropped, expected in (("Name", ["Name"]), ("Division", ["Division"]), ("R1..R10", ["QualScore"])):
+			columns = [column for column in header if column != dropped and not (dropped == "R1..R10" and column.startswith("R"))]
+			path = os.path.join(directory, "scores.tsv")
+			with open(path, "w", encoding="utf-8") as f:
+				f.write("\t".join(columns) + "\n" + "\t".join("Archer0" if column == "Name" else "BB" if column == "Division" else "250" for column in columns) + "\n")
+			scores = load_scores(path)
+			if missing_columns(scores.columns) != expected:
+				failures.append(f"missing_columns(no {dropped}): {missing_columns(scores.columns)}")
+			try:
+				validate(scores)
+				failures.append(f"validate(no {dropped}): accepted the file")
+			except ValueError:
+				pass
+	return failures
+
+if __name__ == "__main__":
+	argparser = argparse.ArgumentParser(prog="python -m Utils.verify")
+	argparser.add_argument("--max_flight", type=int, default=64)
+	argparser.add_argument("--max_players", type=int, default=200)
+	argparser.add_argument("--team_sizes", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+	argparser.add_argument("--seed", type=int, default=0)
+	args = argparser.parse_args()
+
+	start = time.perf_counter()
+	failures = sweep(args.max_flight, args.max_players, args.team_sizes, args.seed)
+	for failure in failures[:50]:
+		print(failure)
+	print(f"{len(failures)} failures in {time.perf_counter() - start:.2f}s")
+	if failures:
+		raise SystemExit(1)
@@ -1,58 +1,78 @@
 import streamlit as st
 import pandas as pd
 from Utils import *
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from Utils import profiling, templates
+from Utils.outputs import frame_bytes
+from Utils.rr_matcher import combined_frame, concat_tables, lineup_frames, match_table
+from Utils.bales import schedule_bales, slot_lower_bound
 from io import BytesIO
+import hashlib
 
 # region Utils
-def matchups_to_pdf(df: pd.DataFrame) -> bytes:
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=36,
-        leftMargin=36,
-        topMargin=36,
-        bottomMargin=36
-    )
-
-    styles = getSampleStyleSheet()
-    story = []
-
-    grouped = df.groupby(["Division", "Flight Number"])
-
-    for (division, flight), table_df in grouped:
-        title = Paragraph(
-            f"<b>Division:</b> {division} &nbsp;&nbsp; <b>Flight:</b> {flight}",
-            styles["Heading2"]
-        )
-        story.append(title)
-        story.append(Spacer(1, 12))
-
-        table_data = [table_df.columns.tolist()] + table_df.values.tolist()
-
-        table = Table(table_data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-            ("TOPPADDING", (0, 0), (-1, 0), 8),
-        ]))
-
-        story.append(table)
-        story.append(PageBreak())
-
-    doc.build(story)
-    buffer.seek(0)
-    return buffer.read()
+@st.cache_resource
+def warm_templates():
+    # schedule templates for the flight sizes the number inputs allow, built once per server process
+    templates.warm(range(1, 17))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def parse_scores(data: bytes, name: str) -> pd.DataFrame:
+    return pd.read_csv(BytesIO(data), sep="," if name.endswith(".csv") else "\t")
+
+# The cached functions below are keyed on the file hash and their settings; underscored arguments aren't hashed.
+@st.cache_data(show_spinner=False, max_entries=8)
+def validate_scores(file_hash: str, _df: pd.DataFrame):
+    return validate(_df)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def split_divisions(file_hash: str, remove_errors: bool, _df: pd.DataFrame) -> dict:
+    return dict(tuple(_df.groupby("Division", sort=True, observed=True)))
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def division_table(file_hash: str, remove_errors: bool, division: str, people_per_flight: int, algorithm: str, partition: str, _section: pd.DataFrame) -> tuple:
+    # archer ids and categorical codes; names only come back when a view or download renders them
+    return match_table(_section, people_per_flight=people_per_flight, algorithm=algorithm, partition=partition)
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def division_matchups(file_hash: str, remove_errors: bool, division: str, people_per_flight: int, algorithm: str, partition: str, _section: pd.DataFrame) -> dict:
+    return lineup_frames(*division_table(file_hash, remove_errors, division, people_per_flight, algorithm, partition, _section))[division]
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def division_teams(file_hash: str, remove_errors: bool, division: str, team_size: int, team_balance: str, _section: pd.DataFrame) -> list:
+    return match_teams(_section, people_per_team=team_size, balance=team_balance)[division]
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def combined_matchups(key: str, _build) -> pd.DataFrame:
+    # every division's names rendered into one frame; _build only runs when the settings behind key change
+    return _build()
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def matchups_file(key: str, output_format: str, _combined) -> bytes:
+    # same renderer as the command line --output_format
+    return frame_bytes(_combined(), output_format)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def matchups_pdf(key: str, _combined) -> bytes:
+    # reportlab is only loaded once someone asks for a PDF
+    from Utils.pdf_export import matchups_to_pdf
+    return matchups_to_pdf(_combined())
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def bale_plan(key: str, bales: int, slot_minutes: int, start: str, _tables) -> tuple:
+    # packs the id tables, so only the planned matches are rendered; _tables is only called on a cache miss
+    registry, table = concat_tables(_tables())
+    return schedule_bales(registry, table, bales, slot_minutes, start), slot_lower_bound(registry, table, bales)
+
+def lazy_download(label: str, key: str, build, file_name: str, mime: str):
+    # the payload is only rendered once asked for, and then reused until the matchups change
+    if st.button(f"Prepare {label}", key=f"prepare_{label}"):
+        st.session_state[f"ready_{label}"] = key
+    if st.session_state.get(f"ready_{label}") == key:
+        st.download_button(f"Download {label}", build(), file_name, mime)
 
 # endregion Utils
 
+warm_templates()
+
 st.title("Round Robin Matcher")
 
 # =========================
@@ -84,9 +104,14 @@ with st.expander("Parameter Descriptions (click to expand)"):
     st.markdown("""
     - **Format:** Competition structure (Round Robin or Eliminations).
     - **Number of Flights:** Number of groups for Round Robin.
-    - **Matching Algorithm:** Method used to generate matchups.
+    - **Matching Algorithm:** Method used to generate matchups. Berger and circle play a full round robin in every flight; swiss pairs round 1 of a Swiss event across each whole division, ignoring the flight size.
+    - **Flight Partition:** Fixed fills each flight to the chosen size and leaves the remainder to the last one; balanced spreads a division evenly over the same number of flights, so there is at most one bye and no flight runs more rounds than it has to.
     - **People per Team:** Team size for eliminations.
+    - **Show Bracket:** Lays the seeded teams out as a single-elimination bracket, 1 against the lowest seed, with byes for the top seeds when the field isn't a power of two.
+    - **Team Balance:** Snake-draft teams by seed (serpentine) or search for teams with the closest total points (optimize).
+    - **Range Schedule:** Packs every flight onto your bales, two matches per bale per slot, in as few slots as it can without anyone shooting twice at once.
     - **Remove Errors:** Drop invalid rows before processing.
+    - **Show Timing:** Show how long each processing stage took.
     """)
 
 # =========================
@@ -119,13 +144,20 @@ with st.container():
     with col1:
         algorithm = st.selectbox(
             "Matching Algorithm",
-            options=["berger"],
+            options=["berger", "circle", "swiss"],
             index=0,
             disabled=(format_type != "Round Robin")
         )
+        partition = st.selectbox(
+            "Flight Partition",
+            options=["fixed", "balanced"],
+            index=0,
+            disabled=(format_type != "Round Robin" or algorithm == "swiss")
+        )
 
     with col2:
         remove_errors = st.checkbox("Remove Errors", value=False)
+        show_timing = st.checkbox("Show Timing", value=False)
 
     with col3:
         if format_type == "Eliminations":
@@ -134,20 +166,28 @@ with st.container():
                 options=[1, 2, 3, 4],
                 index=1
             )
+            team_balance = st.selectbox(
+                "Team Balance",
+                options=["serpentine", "optimize"],
+                index=0
+            )
+            show_bracket = st.checkbox("Show Bracket", value=False)
         else:
             team_size = None
+            team_balance = None
+            show_bracket = False
             st.markdown("")
 
 # Variables to hold state
 df = None
+file_hash = None
 division_sizes = {}
 
 if uploaded_file is not None:
+    data = uploaded_file.getvalue()
+    file_hash = hashlib.sha1(data).hexdigest()
     try:
-        if uploaded_file.name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_csv(uploaded_file, sep="\t")
+        df = parse_scores(data, uploaded_file.name)
     except Exception as e:
         st.error(f"Failed to read the file: {e}")
         df = None
@@ -155,15 +195,32 @@ if uploaded_file is not None:
 if df is not None:
     st.success("File loaded successfully!")
 
+    # a file without the columns validate needs gets a warning below instead of a report
+    missing = missing_columns(df.columns)
+    report = validate_scores(file_hash, df) if not missing else None
+    if report:
+        st.warning(
+            f"{len(report)} rows have problems"
+            + (" and will be removed." if remove_errors else ". Tick 'Remove Errors' to drop them.")
+        )
+        with st.expander("Validation details"):
+            st.dataframe(pd.DataFrame(report.counts().items(), columns=["Issue", "Rows"]))
+            for message in report.messages(df):
+                st.text(message)
+        if remove_errors:
+            df = report.drop(df)
+
     # Division inputs immediately after upload
-    if "Division" in df.columns:
+    if not missing:
         st.markdown("### Division Settings")
 
-        # We need to retain division_sizes across reruns, so use st.session_state
-        if "division_sizes" not in st.session_state:
+        # We need to retain division_sizes across reruns, so use st.session_state; a new file starts over
+        if st.session_state.get("division_sizes_file") != file_hash:
+            st.session_state.division_sizes_file = file_hash
             st.session_state.division_sizes = {
                 division: 4 for division in sorted(df["Division"].dropna().unique())
             }
+            st.session_state.show_results = False
 
         # Display inputs and update session_state
         for division in sorted(df["Division"].dropna().unique()):
@@ -179,70 +236,81 @@ if df is not None:
 
         division_sizes = st.session_state.division_sizes
     else:
-        st.warning("No 'Division' column found in the uploaded file.")
+        quoted = ", ".join(f"'{column}'" for column in missing)
+        st.warning(f"No {quoted} column{'s' if len(missing) > 1 else ''} found in the uploaded file.")
 
-process_clicked = st.button("Process Matchups")
-
-if process_clicked:
+if st.button("Process Matchups"):
+    st.session_state.show_results = True
     if df is None:
         st.error("Please upload a scores file first!")
-    else:
-        st.info(
-            f"Processing {format_type} | "
-            f"People per Flight: {division_sizes} | "
-            f"Algorithm: {algorithm} | "
-            f"Team Size: {team_size}"
-        )
-
-        if format_type == "Round Robin":
-            final_matchups = match_individuals(
-                df,
-                people_per_flight=list(division_sizes.values()) if division_sizes else 4,
-                algorithm=algorithm
-            )
-
-            all_flights_list = []
-
-            for division, flight_info in final_matchups.items():
-                for flight_number, flights in flight_info.items():
-                    st.markdown(
-                        f"### Division: {division} | Flight: {flight_number}"
-                    )
-                    st.dataframe(flights)
-
-                    flights_copy = flights.copy()
-                    flights_copy["Division"] = division
-                    flights_copy["Flight Number"] = flight_number
-                    all_flights_list.append(flights_copy)
-
-            if all_flights_list:
-                combined_df = pd.concat(all_flights_list, ignore_index=True)
-
-                # CSV download
-                csv = combined_df.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    "Download CSV",
-                    csv,
-                    "matchups.csv",
-                    "text/csv"
-                )
-
-                # PDF download
-                pdf_bytes = matchups_to_pdf(combined_df)
-                st.download_button(
-                    "Download PDF",
-                    pdf_bytes,
-                    "matchups.pdf",
-                    "application/pdf"
+    elif missing:
+        st.error("The uploaded file can't be processed without those columns.")
+
+# Once processed, results stay on screen; later reruns only recompute divisions whose settings changed
+if st.session_state.get("show_results") and df is not None and not missing:
+    profiler = profiling.enable() if show_timing else None
+    st.info(
+        f"Processing {format_type} | "
+        f"People per Flight: {division_sizes} | "
+        f"Algorithm: {algorithm} | "
+        f"Team Size: {team_size}"
+    )
+    sections = split_divisions(file_hash, remove_errors, df)
+
+    if format_type == "Round Robin":
+        final_matchups = {}
+        division_settings = []
+
+        for division, section in sections.items():
+            people_per_flight = int(division_sizes.get(division, 4))
+            final_matchups[division] = division_matchups(file_hash, remove_errors, division, people_per_flight, algorithm, partition, section)
+            division_settings.append((division, people_per_flight, section))
+            for flight_number, flights in final_matchups[division].items():
+                st.markdown(
+                    f"### Division: {division} | Flight: {flight_number}"
                 )
-            else:
-                st.warning("No matchup data to download.")
-
-        else:  # Eliminations format
-            # Use your match_teams function here from elim_matcher.py or your Utils
-            final_teams_dict = match_teams(df, people_per_team=team_size)
-
-            for division, teams in final_teams_dict.items():
-                st.markdown(f"### Division: {division}")
-                for team in teams:
-                    st.text(team)
+                st.dataframe(flights)
+
+        if any(final_matchups.values()):
+            settings_key = f"{file_hash}|{remove_errors}|{algorithm}|{partition}|{sorted(division_sizes.items())}"
+            # names are rendered from the cached id tables only when a download or a new range schedule needs them,
+            # with one concat per division rather than per flight
+            tables = lambda: [
+                division_table(file_hash, remove_errors, division, people_per_flight, algorithm, partition, section)
+                for division, people_per_flight, section in division_settings
+            ]
+            combined = lambda: combined_matchups(settings_key, lambda: pd.concat([combined_frame(*table) for table in tables()], ignore_index=True))
+
+            lazy_download("CSV", settings_key, lambda: matchups_file(settings_key, "csv", combined), "matchups.csv", "text/csv")
+            lazy_download("JSONL", settings_key, lambda: matchups_file(settings_key, "jsonl", combined), "matchups.jsonl", "application/jsonl")
+            lazy_download("PDF", settings_key, lambda: matchups_pdf(settings_key, combined), "matchups.pdf", "application/pdf")
+
+            with st.expander("Range Schedule"):
+                bale_cols = st.columns(3)
+                bales = bale_cols[0].number_input("Bales", min_value=1, value=8, step=1)
+                slot_minutes = bale_cols[1].number_input("Minutes per Slot", min_value=1, value=20, step=5)
+                start = bale_cols[2].text_input("First Slot", value="09:00")
+                plan, lower_bound = bale_plan(settings_key, int(bales), int(slot_minutes), start, tables)
+                if not plan.empty:
+                    st.caption(f"{plan['Slot'].max()} slots, ending {plan['Start'].iloc[-1]} (no plan can use fewer than {lower_bound})")
+                st.dataframe(plan, hide_index=True)
+                st.download_button("Download Range Schedule", frame_bytes(plan, "csv"), "range_schedule.csv", "text/csv")
+        else:
+            st.warning("No matchup data to download.")
+
+    else:  # Eliminations format
+        for division, section in sections.items():
+            teams = division_teams(file_hash, remove_errors, division, team_size, team_balance, section)
+            st.markdown(f"### Division: {division}")
+            for team in teams:
+                st.text(team)
+            if show_bracket:
+                from Utils.bracket import Bracket
+                st.dataframe(Bracket.from_teams(teams).frame(), hide_index=True)
+
+    if profiler is not None:
+        profiling.disable()
+        with st.expander("Timing breakdown"):
+            st.caption("Stages served from the app's cache don't appear here.")
+            st.dataframe(pd.DataFrame(profiler.summary()))
+            st.json(dict(profiler.counters))
@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# what a fresh interpreter pays before doing any work, from the bare interpreter up to the full stack
+STATEMENTS = {
+	"python": "pass",
+	"numpy": "import numpy",
+	"pandas": "import pandas",
+	"Utils": "import Utils",
+	"Utils.schedule": "import Utils.schedule",
+	"Utils.loader": "import Utils.loader",
+	"Utils.pdf_export": "import Utils.pdf_export",
+	"schedule_cli": None,  # python -m Utils.schedule -n 8
+}
+
+def command(name : str) -> List[str]:
+	if STATEMENTS[name] is None:
+		return [sys.executable, "-m", "Utils.schedule", "-n", "8"]
+	return [sys.executable, "-c", STATEMENTS[name]]
+
+def measure_imports(names : List[str], repeat : int = 5) -> List[Dict]:
+	"""
+	Best and mean wall time of a fresh interpreter running each statement
+	:param names:
+	:param repeat:
+	:return:
+	"""
+	results = []
+	for name in names:
+		times = []
+		for _ in range(repeat):
+			start = time.perf_counter()
+			subprocess.run(command(name), cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+			times.append(time.perf_counter() - start)
+		results.append({"name": name, "seconds": min(times), "mean_seconds": sum(times) / len(times)})
+		print(f"{name:20s} {min(times) * 1000:8.1f} ms")
+	return results
+
+if __name__ == "__main__":
+	argparser = argparse.ArgumentParser()
+	argparser.add_argument("-c", "--cases", nargs="+", default=list(STATEMENTS), choices=list(STATEMENTS))
+	argparser.add_argument("-n", "--repeat", type=int, default=5)
+	argparser.add_argument("-o", "--output", default=None, help="JSON file for the results")
+	args = argparser.parse_args()
+
+	results = measure_imports(args.cases, args.repeat)
+	if args.output is not None:
+		with open(args.output, "w", encoding="utf-8") as f:
+			json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
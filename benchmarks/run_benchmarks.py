@@ -0,0 +1,260 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_scores
+from Utils.loader import load_scores, validate, with_qual_score
+from Utils.rr_matcher import build_matches, combined_frame, flights_frame, match_individuals, match_table
+from Utils.schedule import rr_convolute, schedule_table
+from Utils.verify import schedule_problems
+from Utils.swiss import BYE, SwissTournament
+from Utils.elim_matcher import create_teams, match_teams, serpentine_teams
+from Utils.bracket import Bracket
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000]
+# a single flight of n has n - 1 rounds of n / 2 pairs, so the schedule cases stop growing here
+MAX_FLIGHT = 2_000
+
+def _even(n : int) -> int:
+	return max(2, n + n % 2)
+
+def _flight_size(size : int) -> int:
+	return _even(min(size, MAX_FLIGHT))
+
+def case_load_scores(size : int, workdir : str) -> Callable:
+	path = os.path.join(workdir, f"scores_{size}.tsv")
+	if not os.path.exists(path):
+		generate_scores(size, missing_rate=0.01).to_csv(path, sep="\t", index=False)
+	return lambda: load_scores(path)
+
+def case_load_scores_typed(size : int, workdir : str) -> Callable:
+	path = os.path.join(workdir, f"scores_{size}.tsv")
+	if not os.path.exists(path):
+		generate_scores(size, missing_rate=0.01).to_csv(path, sep="\t", index=False)
+	return lambda: load_scores(path, typed=True)
+
+def case_validate(size : int, workdir : str) -> Callable:
+	scores = generate_scores(size, missing_rate=0.01)
+	return lambda: validate(scores)
+
+def case_rr_convolute(size : int, workdir : str) -> Callable:
+	n = _flight_size(size)
+	return lambda: rr_convolute(n)
+
+def case_verify_schedule(size : int, workdir : str) -> Callable:
+	n = _flight_size(size)
+	table = schedule_table(n)
+	return lambda: schedule_problems(table, n)
+
+def case_build_matches(size : int, workdir : str) -> Callable:
+	n = _flight_size(size)
+	names = [f"Archer{i}" for i in range(n)]
+	matchups = rr_convolute(n)
+	return lambda: build_matches(names, matchups)
+
+def case_match_individuals(size : int, workdir : str) -> Callable:
+	scores = generate_scores(size)
+	return lambda: match_individuals(scores, people_per_flight=8)
+
+def case_match_table(size : int, workdir : str) -> Callable:
+	# the id-based table and the single combined export frame, without per-flight frames
+	scores = generate_scores(size)
+	return lambda: combined_frame(*match_table(scores, people_per_flight=8))
+
+def case_match_individuals_swiss(size : int, workdir : str) -> Callable:
+	scores = generate_scores(size)
+	return lambda: match_individuals(scores, algorithm="swiss")
+
+def case_swiss_rounds(size : int, workdir : str) -> Callable:
+	names = [f"Archer{i}" for i in range(size)]
+	def run():
+		tournament = SwissTournament(names)
+		for _ in range(tournament.rounds):
+			for first, second in tournament.pair_next_round():
+				if second != BYE:
+					tournament.record_result(first, second, 1)
+	return run
+
+def case_serpentine_teams_2(size : int, workdir : str) -> Callable:
+	n = _even(size)
+	return lambda: serpentine_teams(n, 2)
+
+def case_serpentine_teams_3(size : int, workdir : str) -> Callable:
+	return lambda: serpentine_teams(size, 3, rng=0)
+
+def case_create_teams(size : int, workdir : str) -> Callable:
+	n = _even(size)
+	names = [f"Archer{i}" for i in range(n)]
+	qual_scores = list(range(n))
+	seeds = list(range(n, 0, -1))
+	members = serpentine_teams(n, 2)
+	return lambda: create_teams(names, members, seeds, qual_scores, 2)
+
+def case_bracket(size : int, workdir : str) -> Callable:
+	# build a bracket of size entrants and play it out one result at a time, top seed always winning
+	names = [f"Team{i}" for i in range(size)]
+	def run():
+		bracket = Bracket(names)
+		for round_number in range(1, bracket.rounds + 1):
+			for match in range(1, (bracket.size >> round_number) + 1):
+				node = bracket.node(round_number, match)
+				if bracket.slots[node] < 0:
+					bracket.record_match(node, int(min(bracket.slots[2 * node], bracket.slots[2 * node + 1])) + 1)
+		return bracket
+	return run
+
+def case_match_teams_2(size : int, workdir : str) -> Callable:
+	scores = with_qual_score(generate_scores(size))
+	return lambda: match_teams(scores, people_per_team=2)
+
+def case_match_teams_3(size : int, workdir : str) -> Callable:
+	scores = with_qual_score(generate_scores(size))
+	return lambda: match_teams(scores, people_per_team=3, rng=0)
+
+def case_match_teams_4(size : int, workdir : str) -> Callable:
+	scores = with_qual_score(generate_scores(size))
+	return lambda: match_teams(scores, people_per_team=4)
+
+def case_matchups_to_pdf(size : int, workdir : str) -> Callable:
+	from Utils.pdf_export import matchups_to_pdf
+	combined = flights_frame(match_individuals(generate_scores(size), people_per_flight=8))
+	return lambda: matchups_to_pdf(combined)
+
+# name -> (setup, largest size worth running)
+CASES : Dict[str, tuple] = {
+	"load_scores": (case_load_scores, None),
+	"load_scores_typed": (case_load_scores_typed, None),
+	"validate": (case_validate, None),
+	"rr_convolute": (case_rr_convolute, None),
+	"verify_schedule": (case_verify_schedule, None),
+	"build_matches": (case_build_matches, None),
+	"match_individuals": (case_match_individuals, None),
+	"match_table": (case_match_table, None),
+	"match_individuals_swiss": (case_match_individuals_swiss, None),
+	"swiss_rounds": (case_swiss_rounds, None),
+	"serpentine_teams_2": (case_serpentine_teams_2, None),
+	"serpentine_teams_3": (case_serpentine_teams_3, None),
+	"create_teams": (case_create_teams, None),
+	"bracket": (case_bracket, None),
+	"match_teams_2": (case_match_teams_2, None),
+	"match_teams_3": (case_match_teams_3, None),
+	"match_teams_4": (case_match_teams_4, None),
+	"matchups_to_pdf": (case_matchups_to_pdf, 10_000),
+}
+
+def measure(run : Callable, repeat : int) -> Dict[str, float]:
+	"""
+	Best wall time over repeat runs, then the tracemalloc peak of one more run
+	:param run:
+	:param repeat:
+	:return:
+	"""
+	times = []
+	for _ in range(repeat):
+		gc.collect()
+		start = time.perf_counter()
+		run()
+		times.append(time.perf_counter() - start)
+
+	gc.collect()
+	tracemalloc.start()
+	run()
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return {"seconds": min(times), "mean_seconds": sum(times) / len(times), "peak_bytes": peak}
+
+def git_commit() -> Optional[str]:
+	try:
+		return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+def run_benchmarks(sizes : List[int], names : List[str], repeat : int = 3, time_limit : float = 60.0) -> Dict:
+	"""
+	Runs every selected case at every size. A case stops growing once one run takes longer than time_limit.
+	:param sizes:
+	:param names:
+	:param repeat:
+	:param time_limit: seconds
+	:return:
+	"""
+	results = []
+	with tempfile.TemporaryDirectory() as workdir:
+		for name in names:
+			setup, max_size = CASES[name]
+			for size in sizes:
+				if max_size is not None and size > max_size:
+					print(f"{name:28s} {size:>8d}  skipped (above {max_size})")
+					continue
+				try:
+					result = {"name": name, "size": size, **measure(setup(size, workdir), repeat)}
+				except Exception as e:
+					print(f"{name:28s} {size:>8d}  failed: {e!r}")
+					results.append({"name": name, "size": size, "error": repr(e)})
+					continue
+				results.append(result)
+				print(f"{name:28s} {size:>8d}  {result['seconds'] * 1000:10.2f} ms  {result['peak_bytes'] / 2 ** 20:9.2f} MiB")
+				if result["seconds"] > time_limit:
+					print(f"{name:28s} stopping, over {time_limit}s")
+					break
+
+	return {
+		"commit": git_commit(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"repeat": repeat,
+		"results": results,
+	}
+
+def compare(current : Dict, baseline : Dict, threshold : float = 1.2) -> List[str]:
+	"""
+	Lines for every (case, size) in both runs; ones slower than threshold times the baseline are marked REGRESSION
+	:param current:
+	:param baseline:
+	:param threshold:
+	:return:
+	"""
+	before = {(result["name"], result["size"]): result for result in baseline["results"]}
+	lines = []
+	for result in current["results"]:
+		old = before.get((result["name"], result["size"]))
+		if "error" in result or old is None or "error" in old or old["seconds"] == 0:
+			continue
+		ratio = result["seconds"] / old["seconds"]
+		flag = "  REGRESSION" if ratio > threshold else ""
+		lines.append(f"{result['name']:28s} {result['size']:>8d}  x{ratio:6.2f} time  x{result['peak_bytes'] / max(old['peak_bytes'], 1):6.2f} memory{flag}")
+	return lines
+
+if __name__ == "__main__":
+	argparser = argparse.ArgumentParser()
+	argparser.add_argument("-s", "--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+	argparser.add_argument("-c", "--cases", nargs="+", default=list(CASES), choices=list(CASES))
+	argparser.add_argument("-n", "--repeat", type=int, default=3)
+	argparser.add_argument("-l", "--time_limit", type=float, default=60.0, help="stop growing a case after a run this slow, in seconds")
+	argparser.add_argument("-o", "--output", default=None, help="JSON file for the results")
+	argparser.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+	argparser.add_argument("--threshold", type=float, default=1.2)
+	args = argparser.parse_args()
+
+	report = run_benchmarks(args.sizes, args.cases, args.repeat, args.time_limit)
+
+	if args.output is not None:
+		with open(args.output, "w", encoding="utf-8") as f:
+			json.dump(report, f, indent=2)
+
+	if args.compare is not None:
+		with open(args.compare, encoding="utf-8") as f:
+			baseline = json.load(f)
+		for line in compare(report, baseline, args.threshold):
+			print(line)
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence
+
+DEFAULT_DIVISIONS = ("BB", "FP", "RC", "CU", "LB", "TR")
+
+def generate_scores(archers : int, divisions : int = 4, round_columns : int = 10, missing_rate : float = 0.0, seed : Optional[int] = 0, division_names : Sequence[str] = DEFAULT_DIVISIONS) -> pd.DataFrame:
+	"""
+	Synthetic score sheet in the expected Name/Division/R1..Rn layout
+	:param archers:
+	:param divisions: number of divisions, named from division_names and then D7, D8, ...
+	:param round_columns: number of R columns, 0 gives the QualScore layout instead
+	:param missing_rate: fraction of round cells left empty
+	:param seed:
+	:return:
+	"""
+	rng = np.random.default_rng(seed)
+	names = list(division_names[:divisions]) + [f"D{i + 1}" for i in range(len(division_names), divisions)]
+
+	scores = pd.DataFrame({
+		"Name": [f"Archer{i}" for i in range(archers)],
+		"Division": rng.choice(names, size=archers),
+	})
+	if round_columns == 0:
+		scores["QualScore"] = rng.normal(250, 30, size=archers).round().clip(0, 300)
+		return scores
+
+	skill = rng.normal(25, 3, size=(archers, 1))
+	rounds = np.clip(np.round(skill + rng.normal(0, 2, size=(archers, round_columns))), 0, 30)
+	if missing_rate > 0:
+		rounds[rng.random(rounds.shape) < missing_rate] = np.nan
+	for i in range(round_columns):
+		scores[f"R{i + 1}"] = rounds[:, i]
+	return scores
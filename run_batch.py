@@ -0,0 +1,201 @@
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from Utils import load_scores, validate, match_teams
+from Utils import templates
+from Utils.outputs import MATCHUP_FORMATS, TEAM_FORMATS, write_table, write_teams
+from Utils.rr_matcher import PARTITIONS, match_table
+
+SCORE_SUFFIXES = (".tsv", ".csv", ".txt", ".parquet", ".pq", ".feather", ".arrow")
+FORMATS = ["individual", "2team", "3team", "4team"]
+
+def find_score_files(inputs : List[str], manifest : Optional[str] = None) -> List[str]:
+	"""
+	Score files from directories, globs and plain paths, plus one path per line of a manifest, without repeats
+	:param inputs:
+	:param manifest: text file of paths, relative to the manifest; blank lines and # comments are skipped
+	:return:
+	"""
+	paths = []
+	for entry in inputs:
+		if os.path.isdir(entry):
+			paths.extend(sorted(
+				os.path.join(entry, name) for name in os.listdir(entry)
+				if name.lower().endswith(SCORE_SUFFIXES)
+			))
+		elif glob.has_magic(entry):
+			paths.extend(sorted(glob.glob(entry)))
+		else:
+			paths.append(entry)
+
+	if manifest is not None:
+		base = os.path.dirname(os.path.abspath(manifest))
+		with open(manifest, encoding="utf-8") as f:
+			for line in f:
+				line = line.strip()
+				if line and not line.startswith("#"):
+					paths.append(line if os.path.isabs(line) else os.path.join(base, line))
+
+	return list(dict.fromkeys(paths))
+
+def event_name(path : str) -> str:
+	return os.path.splitext(os.path.basename(path))[0]
+
+def output_names(paths : List[str]) -> List[str]:
+	"""
+	One output folder name per score file. The file name is used when it is unique; a repeated one is prefixed with
+	its parent directory and then numbered until no two events share a folder, even on a case-insensitive file system.
+	:param paths:
+	:return: names aligned with paths
+	"""
+	stems = [event_name(path).casefold() for path in paths]
+	repeated = {stem for stem in stems if stems.count(stem) > 1}
+	used = set()
+	names = []
+	for path, stem in zip(paths, stems):
+		name = event_name(path)
+		if stem in repeated:
+			parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+			name = f"{parent}-{name}" if parent else name
+		unique, number = name, 1
+		while unique.casefold() in used:
+			number += 1
+			unique = f"{name}-{number}"
+		used.add(unique.casefold())
+		if unique != event_name(path):
+			print(f"{path} would share an output folder with another input, writing it to {unique}")
+		names.append(unique)
+	return names
+
+def print_row(row : Dict):
+	status = "failed: " + row["error"] if row["error"] else f"{row['outputs']} files"
+	print(f"{row['seconds']:8.2f}s  {row['file']}  {status}")
+
+def run_event(job : tuple) -> Dict:
+	"""
+	Every requested format for one score file, in a worker. Failures are returned, not raised, so the batch keeps going.
+	:param job: (path, output_dir, formats, options)
+	:return: a report row
+	"""
+	path, output_dir, formats, options = job
+	start = time.perf_counter()
+	row = {"file": path, "output_dir": output_dir, "outputs": 0, "error": None}
+	try:
+		os.makedirs(output_dir, exist_ok=True)
+		scores = load_scores(path, typed=options["typed"], engine=options["engine"])
+		report = validate(scores)
+		row["issues"] = len(report)
+		if options["remove_errors"]:
+			scores = report.drop(scores)
+		row["load_seconds"] = time.perf_counter() - start
+
+		for event_format in formats:
+			format_start = time.perf_counter()
+			if event_format == "individual":
+				registry, table = match_table(scores, people_per_flight=options["people_per_flight"], algorithm=options["algorithm"], partition=options["partition"])
+				row["outputs"] += len(write_table(registry, table, output_dir, options["matchup_format"]))
+			else:
+				people_per_team = int(event_format[0])
+				final_teams = match_teams(scores, people_per_team=people_per_team, rng=options["seed"], balance=options["balance"])
+				row["outputs"] += len(write_teams(final_teams, output_dir, people_per_team, options["team_format"]))
+			row[f"{event_format}_seconds"] = time.perf_counter() - format_start
+	except Exception as e:
+		row["error"] = f"{type(e).__name__}: {e}"
+		row["traceback"] = traceback.format_exc()
+	row["seconds"] = time.perf_counter() - start
+	return row
+
+def run_batch(paths : List[str], output_root : str, formats : List[str], options : Dict, workers : Optional[int] = None, template_dir : Optional[str] = None) -> List[Dict]:
+	"""
+	Runs every score file on a process pool that shares one schedule template store, keeping at most two jobs per
+	worker in flight so a large batch never queues hundreds of results at once
+	:param paths:
+	:param output_root: each event writes into its own sub directory, named by output_names
+	:param formats:
+	:param options:
+	:param workers:
+	:param template_dir: None uses a temporary store for this batch
+	:return: report rows in completion order
+	"""
+	jobs = [(path, os.path.join(output_root, name), formats, options) for path, name in zip(paths, output_names(paths))]
+	workers = (os.cpu_count() or 1) if workers is None else workers
+
+	with tempfile.TemporaryDirectory() as scratch:
+		directory = scratch if template_dir is None else template_dir
+		# the parent fills the store once, then every worker memory maps the same files
+		templates.configure(directory=directory)
+		templates.warm(range(2, max(options["people_per_flight"], 16) + 2, 2))
+
+		rows = []
+		if workers <= 1:
+			for job in jobs:
+				rows.append(run_event(job))
+				print_row(rows[-1])
+			return rows
+
+		with ProcessPoolExecutor(max_workers=workers, initializer=templates.configure, initargs=templates.settings()) as executor:
+			pending = set()
+			for job in jobs:
+				pending.add(executor.submit(run_event, job))
+				if len(pending) >= 2 * workers:
+					done, pending = wait(pending, return_when=FIRST_COMPLETED)
+					for future in done:
+						rows.append(future.result())
+						print_row(rows[-1])
+			for future in wait(pending).done:
+				rows.append(future.result())
+				print_row(rows[-1])
+		return rows
+
+if __name__ == "__main__":
+	argparser = argparse.ArgumentParser()
+	argparser.add_argument("inputs", nargs="*", help="score files, directories of score files or globs")
+	argparser.add_argument("-m", "--manifest", default=None, help="text file with one score file per line")
+	argparser.add_argument("-f", "--formats", nargs="+", default=["individual"], choices=FORMATS)
+	argparser.add_argument("-o", "--output_dir", default="Matchups")
+	argparser.add_argument("--matchup_format", default="flights", choices=list(MATCHUP_FORMATS))
+	argparser.add_argument("--team_format", default="teams", choices=list(TEAM_FORMATS))
+	argparser.add_argument("-w", "--workers", type=int, default=None, help="process pool size, defaults to the CPU count; 1 runs in this process")
+	argparser.add_argument("-p", "--people_per_flight", type=int, default=4)
+	argparser.add_argument("-a", "--algorithm", default="berger", choices=["berger", "circle", "swiss"])
+	argparser.add_argument("--partition", default="fixed", choices=list(PARTITIONS), help="flight sizes, see Utils.rr_matcher.flight_sizes")
+	argparser.add_argument("-b", "--balance", default="serpentine", choices=["serpentine", "optimize"])
+	argparser.add_argument("--seed", type=int, default=None)
+	argparser.add_argument("-r", "--remove_errors", action="store_true")
+	argparser.add_argument("-t", "--typed", action="store_true", help="load only the needed columns with compact dtypes")
+	argparser.add_argument("--engine", default=None, choices=["c", "python", "pyarrow"], help="pandas CSV engine")
+	argparser.add_argument("--template_dir", default=None, help="keep the shared schedule templates here between batches")
+	argparser.add_argument("--report", default=None, help="write per-file timings and failures to this JSON file")
+	args = argparser.parse_args()
+
+	paths = find_score_files(args.inputs, args.manifest)
+	options = {
+		"people_per_flight": args.people_per_flight,
+		"algorithm": args.algorithm,
+		"partition": args.partition,
+		"balance": args.balance,
+		"seed": args.seed,
+		"remove_errors": args.remove_errors,
+		"typed": args.typed,
+		"engine": args.engine,
+		"matchup_format": args.matchup_format,
+		"team_format": args.team_format,
+	}
+
+	start = time.perf_counter()
+	rows = run_batch(paths, args.output_dir, args.formats, options, args.workers, args.template_dir)
+	failed = [row for row in rows if row["error"]]
+	print(f"{len(rows) - len(failed)} of {len(rows)} events done in {time.perf_counter() - start:.2f}s")
+
+	if args.report is not None:
+		with open(args.report, "w", encoding="utf-8") as f:
+			json.dump({"seconds": time.perf_counter() - start, "events": rows}, f, indent=2)
+	if failed:
+		raise SystemExit(1)
@@ -2,29 +2,92 @@ import argparse
 import os
 from Utils import load_scores
 from Utils import *
+from Utils import profiling
+from Utils.bracket import BRACKET_COLUMNS, Bracket, load_brackets, save_brackets
+from Utils.outputs import TEAM_FORMATS, write_teams
+import pandas as pd
 
 if __name__ == "__main__":
     argparser = argparse.ArgumentParser()
     argparser.add_argument("-s", "--score_file", default="Data/quals_scores.tsv")
     argparser.add_argument("-r", "--remove_errors", action="store_true")
-    argparser.add_argument("-f", "--format", type=str, default="2team", choices=["2team", "3team"])
+    argparser.add_argument("-f", "--format", type=str, default="2team", choices=["individual", "2team", "3team", "4team"])
+    argparser.add_argument("-b", "--balance", default="serpentine", choices=["serpentine", "optimize"], help="snake draft by seed, or search for teams with close totals")
+    argparser.add_argument("--time_budget", type=float, default=0.25, help="seconds per division for --balance optimize")
+    argparser.add_argument("--seed", type=int, default=None, help="random seed for the middle-band draw of 3+ person teams")
+    argparser.add_argument("--standings", default=None, help="seed from the round robin results in this JSONL log instead of the score file")
+    argparser.add_argument("--bracket", action="store_true", help="also write a seeded single-elimination bracket per division")
+    argparser.add_argument("--bracket_state", default=None, help="JSON file carrying the brackets between runs; once it exists the brackets are loaded from it instead of new teams")
+    argparser.add_argument("--results", nargs="+", default=None, help="filled in bracket files (a Winner name or seed per match) to record before writing")
     argparser.add_argument("-o", "--output_dir", default="Matchups")
+    argparser.add_argument("--output_format", default="teams", choices=list(TEAM_FORMATS), help="a text file per division, or one combined tsv, csv, jsonl or parquet file")
+    argparser.add_argument("-t", "--typed", action="store_true", help="load only the needed columns with compact dtypes")
+    argparser.add_argument("--engine", default=None, choices=["c", "python", "pyarrow"], help="pandas CSV engine")
+    argparser.add_argument("--verify", action="store_true", help="check every archer is on exactly one team before writing")
+    argparser.add_argument("--profile", default=None, help="write a JSON trace of per-stage timings to this file")
+    argparser.add_argument("--cprofile", default=None, help="also write cProfile stats to this file")
     args = argparser.parse_args()
 
+    if args.profile is not None:
+        profiling.enable()
+    if args.cprofile is not None:
+        import cProfile
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+
     os.makedirs(args.output_dir, exist_ok=True)
 
-    scores = load_scores(args.score_file, args.remove_errors)
+    if args.standings is not None:
+        from Utils.results import ResultsLog
+        scores = ResultsLog(args.standings).standings.as_scores()
+    else:
+        scores = load_scores(args.score_file, typed=args.typed, engine=args.engine)
+    report = validate(scores)
+    for message in report.messages(scores):
+        print(message)
+    if args.remove_errors:
+        scores = report.drop(scores)
+
+    people_per_team = 1 if args.format == "individual" else int(args.format[0])
+
+    brackets = None
+    if args.bracket_state is not None and os.path.exists(args.bracket_state):
+        # the teams are fixed once a bracket is running
+        brackets = load_brackets(args.bracket_state)
+    else:
+        # Run team matching
+        final_teams_dict = match_teams(scores, people_per_team=people_per_team, rng=args.seed, balance=args.balance, time_budget=args.time_budget)
+        if args.verify:
+            from Utils.verify import team_table_problems
+            for division, teams in final_teams_dict.items():
+                problems = team_table_problems(teams)
+                assert not problems, f"{division}: " + "; ".join(problems)
 
-    people_per_team = 2 if args.format == "2team" else 3
+        for division, flights in final_teams_dict.items():
+            print(flights)
+        write_teams(final_teams_dict, args.output_dir, people_per_team, args.output_format)
 
-    # Run team matching
-    final_teams_dict = match_teams(scores, people_per_team=people_per_team)
+        print(f"Team matchups saved to {args.output_dir}")
+        if args.bracket or args.bracket_state is not None:
+            brackets = {division: Bracket.from_teams(teams) for division, teams in final_teams_dict.items()}
 
-    for division, flights in final_teams_dict.items():
-        print(flights)
-        output_file = os.path.join(args.output_dir, f"{division}_{people_per_team}-person_teams.txt")
-        with open(output_file, "w", encoding="utf-8") as f:
-            for flight_num, teams in enumerate(flights, start=1):
-                    f.write(teams + "\n")
+    if brackets is not None:
+        for results_file in args.results or []:
+            results = pd.read_csv(results_file, sep="\t", dtype=str, keep_default_na=False)
+            for row in results[results["Winner"] != ""].itertuples(index=False):
+                bracket = brackets[row.Division]
+                bracket.record_match(bracket.node(int(row.Round), int(row.Match)), int(row.Winner) if row.Winner.isdigit() else row.Winner)
+        for division, bracket in brackets.items():
+            out = os.path.join(args.output_dir, f"{division}_bracket.tsv")
+            bracket.frame().assign(Division=division)[["Division"] + BRACKET_COLUMNS].to_csv(out, sep="\t", index=False)
+            if bracket.champion is not None:
+                print(f"{division} champion: {bracket.champion}")
+        if args.bracket_state is not None:
+            save_brackets(args.bracket_state, brackets)
+        print(f"Brackets saved to {args.output_dir}")
 
-    print(f"Team matchups saved to {args.output_dir}")
+    if args.cprofile is not None:
+        cprofiler.disable()
+        cprofiler.dump_stats(args.cprofile)
+    if args.profile is not None:
+        profiling.disable().dump(args.profile)
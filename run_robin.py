@@ -1,8 +1,13 @@
 import argparse
+from itertools import chain, islice
 
-from Utils import load_scores
-from Utils.rr_matcher import match_individuals
+from Utils import load_scores, validate
+from Utils import profiling, templates
+from Utils.rr_matcher import PARTITIONS, match_table, combined_frame, split_flights, iter_round_lineups, swiss_lineup
+from Utils.outputs import MATCHUP_FORMATS, write_table
+from Utils.swiss import SwissTournament, load_tournaments, save_tournaments
 import os
+import pandas as pd
 
 if __name__ == "__main__":
 	argparser = argparse.ArgumentParser()
@@ -10,17 +15,119 @@ if __name__ == "__main__":
 	argparser.add_argument("-r", "--remove_errors", action="store_true")
 	argparser.add_argument("-f", "--format", type=str, help="individual, 2team, or 3team", default="individual", choices=["individual", "2team", "3team"])
 	argparser.add_argument("-o", "--output_dir", default="Matchups")
+	argparser.add_argument("-p", "--people_per_flight", type=int, nargs="+", default=[4], help="one flight size for every division, or one per division in sorted order")
+	argparser.add_argument("--partition", default="fixed", choices=list(PARTITIONS), help="fixed fills flights to size; balanced spreads each division evenly for at most one bye")
+	argparser.add_argument("-a", "--algorithm", default="berger", choices=["berger", "circle", "swiss"])
+	argparser.add_argument("--swiss_state", default=None, help="with -a swiss, JSON file carrying the event between rounds; each run pairs the next round")
+	argparser.add_argument("--swiss_rounds", type=int, default=None, help="rounds in a new Swiss event, defaults to ceil(log2) of the division size")
+	argparser.add_argument("--results", nargs="+", default=None, help="filled in Swiss round files (a Result column of 1, 0.5 or 0 for First) to score before pairing")
+	argparser.add_argument("--output_format", default="flights", choices=list(MATCHUP_FORMATS), help="a TSV per flight, or one combined tsv, csv, jsonl or parquet file")
+	argparser.add_argument("-t", "--typed", action="store_true", help="load only the needed columns with compact dtypes")
+	argparser.add_argument("--template_dir", default=None, help="directory of precomputed schedule templates, created and warmed if needed")
+	argparser.add_argument("--pdf", action="store_true", help="also write every flight to matchups.pdf in the output directory")
+	argparser.add_argument("--bales", type=int, default=None, help="also pack every flight onto this many bales and write range_schedule.tsv")
+	argparser.add_argument("--slot_minutes", type=int, default=None, help="with --bales, length of a shooting slot, adds start times")
+	argparser.add_argument("-w", "--workers", type=int, default=None, help="process pool size for PDF rendering, and write threads for the per-flight layout")
+	argparser.add_argument("--engine", default=None, choices=["c", "python", "pyarrow"], help="pandas CSV engine")
+	argparser.add_argument("--stream", action="store_true", help="write each flight round by round as Round/Match/Bale/Matchup rows instead of one table per flight")
+	argparser.add_argument("--rounds", type=int, nargs="+", default=None, help="with --stream, only these 1-based rounds")
+	argparser.add_argument("--verify", action="store_true", help="check every flight is a complete round robin before writing it")
+	argparser.add_argument("--profile", default=None, help="write a JSON trace of per-stage timings to this file")
+	argparser.add_argument("--cprofile", default=None, help="also write cProfile stats to this file")
 	args = argparser.parse_args()
+	if args.stream and args.algorithm == "swiss":
+		# checked before any output is opened, so a rejected run leaves no partial round files behind
+		argparser.error("--stream writes fixed round robin schedules; -a swiss pairs one round per run, use --swiss_state instead")
+
+	if args.profile is not None:
+		profiling.enable()
+	if args.cprofile is not None:
+		import cProfile
+		cprofiler = cProfile.Profile()
+		cprofiler.enable()
 
 	os.makedirs(args.output_dir, exist_ok=True)
 
+	if args.template_dir is not None:
+		templates.configure(directory=args.template_dir)
+		templates.warm()
+
 	# get the scores
-	scores = load_scores(args.score_file, args.remove_errors)
+	scores = load_scores(args.score_file, typed=args.typed, engine=args.engine)
+	report = validate(scores)
+	for message in report.messages(scores):
+		print(message)
+	if args.remove_errors:
+		scores = report.drop(scores)
+	people_per_flight = args.people_per_flight[0] if len(args.people_per_flight) == 1 else args.people_per_flight
 
 	match args.format:
+		case "individual" if args.algorithm == "swiss" and args.swiss_state is not None:
+			if os.path.exists(args.swiss_state):
+				tournaments = load_tournaments(args.swiss_state)
+			else:
+				tournaments = {
+					division: SwissTournament([name for name in flights[1] if name != "BYE"], args.swiss_rounds)
+					for division, flights in split_flights(scores, people_per_flight=max(len(scores), 1)).items()
+				}
+			for results_file in args.results or []:
+				results = pd.read_csv(results_file, sep="\t")
+				# byes score themselves and a blank Result is a match still to be entered
+				for row in results[(results["Second"] != "BYE") & results["Result"].notna()].itertuples(index=False):
+					tournaments[row.Division].record_result(row.First, row.Second, float(row.Result))
+			for division, tournament in tournaments.items():
+				if tournament.rounds_played == tournament.rounds:
+					# finished: its last results are recorded above, but there is nothing left to pair
+					print(f"{division} has played all {tournament.rounds} rounds.")
+					continue
+				pairs = tournament.pair_next_round()
+				out = os.path.join(args.output_dir, f"{division}_swiss-round-{tournament.rounds_played}.tsv")
+				pd.DataFrame({
+					"Division": division,
+					"Match": range(1, len(pairs) + 1),
+					"Bale": swiss_lineup(pairs)["Bale"].to_numpy(),
+					"First": [first for first, _ in pairs],
+					"Second": [second for _, second in pairs],
+					"Result": "",
+				}).to_csv(out, sep="\t", index=False)
+			save_tournaments(args.swiss_state, tournaments)
+		case "individual" if args.stream:
+			for division, flights in split_flights(scores, people_per_flight, args.partition).items():
+				for flight, flight_names in flights.items():
+					out = os.path.join(args.output_dir, f"{division}_flight-{flight}_rounds.tsv")
+					# a short flight simply has no rows for rounds past its last one
+					rounds = None if args.rounds is None else [r for r in args.rounds if 1 <= r < len(flight_names)]
+					lineups = iter_round_lineups(flight_names, args.algorithm, rounds=rounds)
+					# the first round is built before the file is opened, so a flight that can't be scheduled leaves no truncated file
+					first = list(islice(lineups, 1))
+					with open(out, "w", encoding="utf-8", newline="") as f:
+						for i, lineup in enumerate(chain(first, lineups)):
+							round_column = lineup.columns[-1]
+							pd.DataFrame({
+								"Round": int(round_column.split()[-1]),
+								"Match": lineup.index,
+								"Bale": lineup["Bale"],
+								"Matchup": lineup[round_column],
+							}).to_csv(f, sep="\t", index=False, header=i == 0)
+							f.flush()
 		case "individual":
-			final_matchups = match_individuals(scores, people_per_flight=4)
-			for division, flight_info in final_matchups.items():
-				for flight, matchups in flight_info.items():
-					out = os.path.join(args.output_dir, f"{division}_flight-{flight}.tsv")
-					matchups.to_csv(out, sep="\t", index=True)
\ No newline at end of file
+			registry, table = match_table(scores, people_per_flight=people_per_flight, algorithm=args.algorithm, partition=args.partition)
+			if args.verify and args.algorithm != "swiss":
+				from Utils.verify import table_problems
+				with profiling.stage("verify"):
+					problems = table_problems(table)
+					assert not problems, "; ".join(problems[:5])
+			write_table(registry, table, args.output_dir, args.output_format, workers=args.workers)
+			if args.bales is not None:
+				from Utils.bales import schedule_bales
+				schedule_bales(registry, table, args.bales, args.slot_minutes).to_csv(os.path.join(args.output_dir, "range_schedule.tsv"), sep="\t", index=False)
+			if args.pdf:
+				from Utils.pdf_export import matchups_to_pdf
+				with profiling.stage("pdf"):
+					matchups_to_pdf(combined_frame(registry, table), os.path.join(args.output_dir, "matchups.pdf"), workers=args.workers)
+
+	if args.cprofile is not None:
+		cprofiler.disable()
+		cprofiler.dump_stats(args.cprofile)
+	if args.profile is not None:
+		profiling.disable().dump(args.profile)
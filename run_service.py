@@ -0,0 +1,20 @@
+import argparse
+import asyncio
+
+from Utils.service import MatchService
+
+if __name__ == "__main__":
+	argparser = argparse.ArgumentParser()
+	argparser.add_argument("--host", default="127.0.0.1")
+	argparser.add_argument("--port", type=int, default=8765)
+	argparser.add_argument("-w", "--workers", type=int, default=None, help="process pool size for matcher jobs, defaults to the CPU count")
+	argparser.add_argument("--max_pending", type=int, default=None, help="jobs allowed to queue for the pool, defaults to 4 per worker")
+	argparser.add_argument("--template_dir", default=None, help="directory of precomputed schedule templates, created and warmed at startup")
+	args = argparser.parse_args()
+
+	service = MatchService(args.workers, args.template_dir, args.max_pending)
+	print(f"Serving POST /match_individuals, POST /match_teams and GET /health on http://{args.host}:{args.port}")
+	try:
+		asyncio.run(service.serve(args.host, args.port))
+	except KeyboardInterrupt:
+		pass